@@ -0,0 +1,87 @@
+import os
+import argparse
+import warnings
+import numpy as np
+
+from time import time
+from pandas import DataFrame
+from sklearn.metrics import accuracy_score
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.model_selection import train_test_split
+from main import get_dataset_name, get_class_column_by_name
+from src.binning import Binner
+from src.data import Data
+
+warnings.filterwarnings("ignore")
+
+
+def benchmark(dataset_path, max_bins=(255, 64, 16), repeat=5):
+    """Fit decision trees on 80% of a dataset, on raw values and on bin codes, and time the fits.
+
+    Keyword arguments:
+        dataset_path -- dataset's absolute/relative path
+        max_bins -- binners' maximum numbers of bins per feature (default (255, 64, 16))
+        repeat -- fits timed per representation, the fastest is kept (default 5)
+    """
+    dataset_name = get_dataset_name(dataset_path)[:-4]
+    data = Data.load(dataset_path, get_class_column_by_name(dataset_path))
+
+    x = data.x.astype(float)
+    x_train, x_test, y_train, y_test = train_test_split(x, data.y, test_size=0.2, stratify=data.y, random_state=0)
+
+    representations = {'float': (0, x_train, x_test)}
+
+    for n in max_bins:
+        start = time()
+        binner = Binner(n).fit(x_train)
+        codes = binner.transform(x_train), binner.transform(x_test)
+
+        representations['bins_{}'.format(n)] = (time() - start,) + codes
+
+    rows = []
+
+    for name, (bin_seconds, train, test) in representations.items():
+        fit_seconds = np.inf
+
+        for _ in range(repeat):
+            tree = DecisionTreeClassifier(random_state=0)
+
+            start = time()
+            tree.fit(train, y_train)
+            fit_seconds = min(fit_seconds, time() - start)
+
+        rows.append({'representation': name,
+                     'n_train': train.shape[0],
+                     'n_features': train.shape[1],
+                     'bin_seconds': bin_seconds,
+                     'fit_seconds': fit_seconds,
+                     'n_nodes': tree.tree_.node_count,
+                     'accuracy': accuracy_score(y_test, tree.predict(test))})
+
+    results = DataFrame(rows)
+
+    os.makedirs('tests/benchmark', exist_ok=True)
+    results.to_csv('tests/benchmark/{}_binning.csv'.format(dataset_name), index=False)
+
+    print(results)
+
+    return results
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-d", "--dataset",
+                        dest="dataset_path",
+                        help="Dataset's absolute/relative path.",
+                        required=True)
+
+    parser.add_argument("-b", "--max-bins",
+                        default="255,64,16",
+                        dest="max_bins",
+                        help="Binners' maximum numbers of bins, separated by commas.")
+
+    args = vars(parser.parse_args())
+
+    benchmark(args['dataset_path'], [int(n) for n in args['max_bins'].split(',')])
@@ -0,0 +1,133 @@
+import os
+import json
+import argparse
+import warnings
+import numpy as np
+
+from time import time
+from pandas import DataFrame
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from main import get_dataset_name, get_class_column_by_name
+from src.data import Data
+from src.cascade import Cascade
+from src.ensemble import DistributedEnsemble
+from src.preprocessing import load_preprocessor
+from src.test import load_learners, load_aggregator
+
+warnings.filterwarnings("ignore")
+
+
+def benchmark(dataset_path, params_path, aggregator, batch_sizes, n_batches=100, n_first=None):
+    """Fit, save and load a DistributedEnsemble and return its load and batch prediction times.
+
+    Keyword arguments:
+        dataset_path -- dataset's absolute/relative path
+        params_path -- params file's absolute/relative path
+        aggregator -- an aggregator's spec, with only one method, in the params' format
+        batch_sizes -- a list of batch sizes
+        n_batches -- number of batches timed per batch size (default 100)
+        n_first -- learners queried first by an early-exit cascade (default None, no cascade)
+    """
+    dataset_name = get_dataset_name(dataset_path)[:-4]
+
+    params = open(params_path, 'r')
+    p = json.load(params)
+    params.close()
+
+    DistributedEnsemble.check_params(p)
+
+    classifiers, _, _ = load_learners(p['classifiers'], p.get('n_learners'), p.get('learner_mix'), p['random_state'])
+    preprocessor = load_preprocessor(p.get('preprocessing'))
+
+    # Hold out test rows
+    data = Data.load(dataset_path, get_class_column_by_name(dataset_path))
+    train_i, test_i = train_test_split(np.arange(data.n_instances), test_size=0.2,
+                                       stratify=data.y, random_state=p['random_state'])
+
+    train = Data(data.x[train_i, :], data.classes[data.y[train_i]])
+    x_test = data.x[test_i, :].astype(float)
+    y_test = data.classes[data.y[test_i]]
+
+    cascade = Cascade(n_first) if n_first is not None else None
+    ensemble = DistributedEnsemble.fit(train, classifiers, load_aggregator(aggregator, p.get('meta_input', 'proba')),
+                                       p['overlap'], p['random_state'], preprocessor, cascade=cascade)
+
+    os.makedirs('tests/benchmark', exist_ok=True)
+
+    filepath = 'tests/benchmark/{}_ensemble.joblib'.format(dataset_name)
+    ensemble.save(filepath)
+
+    rows = []
+    random_state = np.random.RandomState(p['random_state'])
+
+    for mmap_mode in ['c', None]:
+        t = time()
+        loaded = DistributedEnsemble.load(filepath, mmap_mode)
+        load_seconds = time() - t
+
+        accuracy = accuracy_score(y_test, loaded.predict(x_test))
+        early_exit = loaded.n_early / loaded.n_predicted if cascade is not None else 0
+
+        for batch_size in batch_sizes:
+            seconds = []
+
+            for _ in range(n_batches):
+                batch = x_test[random_state.randint(len(test_i), size=batch_size), :]
+
+                t = time()
+                loaded.predict(batch)
+                seconds.append(time() - t)
+
+            print('mmap {}, batch {}: {:.2f} ms'.format(mmap_mode, batch_size, np.median(seconds) * 1000))
+
+            rows.append({'mmap_mode': mmap_mode,
+                         'file_bytes': os.path.getsize(filepath),
+                         'load_seconds': load_seconds,
+                         'accuracy': accuracy,
+                         'early_exit': early_exit,
+                         'batch_size': batch_size,
+                         'batch_seconds_median': np.median(seconds),
+                         'batch_seconds_p95': np.percentile(seconds, 95),
+                         'rows_per_second': batch_size / np.median(seconds)})
+
+    results = DataFrame(rows)
+    results.to_csv('tests/benchmark/{}_ensemble.csv'.format(dataset_name), index=False)
+
+    return results
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-d", "--dataset",
+                        dest="dataset_path",
+                        help="Dataset's absolute/relative path.",
+                        required=True)
+
+    parser.add_argument("-p", "--params",
+                        default='tests/multiclass.json',
+                        dest="params_path",
+                        help=".json params file's absolute/relative path.")
+
+    parser.add_argument("-a", "--aggregator",
+                        default='{"combiner": {"cmb_gnb": "sklearn.naive_bayes.GaussianNB()"}}',
+                        dest="aggregator",
+                        help="Aggregator's JSON spec, with only one method, as in the params file.")
+
+    parser.add_argument("-b", "--batch-sizes",
+                        default='1,10,100,1000',
+                        dest="batch_sizes",
+                        help="Comma-separated batch sizes.")
+
+    parser.add_argument("-c", "--cascade",
+                        default=None,
+                        type=int,
+                        dest="n_first",
+                        help="Learners queried first by an early-exit cascade.")
+
+    args = vars(parser.parse_args())
+
+    benchmark(args['dataset_path'], args['params_path'], json.loads(args['aggregator']),
+              [int(b) for b in args['batch_sizes'].split(',')], n_first=args['n_first'])
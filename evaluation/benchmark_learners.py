@@ -0,0 +1,73 @@
+import os
+import json
+import argparse
+import warnings
+
+from time import time
+from pandas import DataFrame
+from main import run_test, get_dataset_name, get_class_column_by_name
+
+warnings.filterwarnings("ignore")
+
+
+def benchmark(dataset_path, params_path, n_learners):
+    """Run one CV iteration for each number of learners and return the elapsed times.
+
+    Keyword arguments:
+        dataset_path -- dataset's absolute/relative path
+        params_path -- params file's absolute/relative path
+        n_learners -- a list of numbers of learners
+    """
+    dataset_name = get_dataset_name(dataset_path)[:-4]
+
+    params = open(params_path, 'r')
+    p = json.load(params)
+    params.close()
+
+    p['dataset'] = dataset_path
+    p['class_column'] = get_class_column_by_name(dataset_path)
+    p['iterations'] = 1
+
+    rows = []
+
+    for n in n_learners:
+        p['n_learners'] = n
+        p['result_path'] = 'tests/benchmark/{}_{}'.format(dataset_name, n)
+
+        os.makedirs(p['result_path'], exist_ok=True)
+
+        t = time()
+        run_test(p)
+        elapsed = time() - t
+
+        print('{} learners: {:.1f} seconds'.format(n, elapsed))
+        rows.append({'n_learners': n, 'seconds': elapsed})
+
+    results = DataFrame(rows)
+    results.to_csv('tests/benchmark/{}_learners.csv'.format(dataset_name), index=False)
+
+    return results
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-d", "--dataset",
+                        dest="dataset_path",
+                        help="Dataset's absolute/relative path.",
+                        required=True)
+
+    parser.add_argument("-p", "--params",
+                        default='tests/multiclass.json',
+                        dest="params_path",
+                        help=".json params file's absolute/relative path.")
+
+    parser.add_argument("-n", "--n-learners",
+                        default='5,25,50,100,200',
+                        dest="n_learners",
+                        help="Comma-separated numbers of learners.")
+
+    args = vars(parser.parse_args())
+
+    benchmark(args['dataset_path'], args['params_path'], [int(n) for n in args['n_learners'].split(',')])
@@ -0,0 +1,99 @@
+import os
+import argparse
+import warnings
+import numpy as np
+
+from time import time
+from pandas import DataFrame
+from sklearn.metrics import accuracy_score
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.model_selection import train_test_split
+from main import get_dataset_name, get_class_column_by_name
+from src.data import Data
+from src.neighbors import LSHKNeighborsClassifier
+
+warnings.filterwarnings("ignore")
+
+
+def benchmark(dataset_path, n_neighbors=5, n_tables=8, n_bits=12, repeat=5):
+    """Fit exact and LSH k-nearest neighbors on 80% of a dataset and time their predictions on the rest.
+
+    Keyword arguments:
+        dataset_path -- dataset's absolute/relative path
+        n_neighbors -- number of neighbors (default 5)
+        n_tables -- LSH's number of hash tables (default 8)
+        n_bits -- LSH's number of projections per table (default 12)
+        repeat -- predictions timed per classifier, the fastest is kept (default 5)
+    """
+    dataset_name = get_dataset_name(dataset_path)[:-4]
+    data = Data.load(dataset_path, get_class_column_by_name(dataset_path))
+
+    x = data.x.astype(float)
+    x_train, x_test, y_train, y_test = train_test_split(x, data.y, test_size=0.2, stratify=data.y, random_state=0)
+
+    classifiers = {'knn_brute': KNeighborsClassifier(n_neighbors, algorithm='brute'),
+                   'knn_auto': KNeighborsClassifier(n_neighbors),
+                   'lsh': LSHKNeighborsClassifier(n_neighbors, n_tables=n_tables, n_bits=n_bits, random_state=0)}
+
+    rows = []
+
+    for name, classifier in classifiers.items():
+        t = time()
+        classifier.fit(x_train, y_train)
+        fit_seconds = time() - t
+
+        predict_seconds = np.inf
+
+        for _ in range(repeat):
+            t = time()
+            y_pred = classifier.predict(x_test)
+            predict_seconds = min(predict_seconds, time() - t)
+
+        rows.append({'classifier': name,
+                     'n_train': x_train.shape[0],
+                     'n_test': x_test.shape[0],
+                     'n_features': x.shape[1],
+                     'fit_seconds': fit_seconds,
+                     'predict_seconds': predict_seconds,
+                     'accuracy': accuracy_score(y_test, y_pred)})
+
+    results = DataFrame(rows)
+
+    os.makedirs('tests/benchmark', exist_ok=True)
+    results.to_csv('tests/benchmark/{}_neighbors.csv'.format(dataset_name), index=False)
+
+    print(results)
+
+    return results
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-d", "--dataset",
+                        dest="dataset_path",
+                        help="Dataset's absolute/relative path.",
+                        required=True)
+
+    parser.add_argument("-k", "--n-neighbors",
+                        default=5,
+                        type=int,
+                        dest="n_neighbors",
+                        help="Number of neighbors.")
+
+    parser.add_argument("-t", "--n-tables",
+                        default=8,
+                        type=int,
+                        dest="n_tables",
+                        help="LSH's number of hash tables.")
+
+    parser.add_argument("-b", "--n-bits",
+                        default=12,
+                        type=int,
+                        dest="n_bits",
+                        help="LSH's number of projections per table.")
+
+    args = vars(parser.parse_args())
+
+    benchmark(args['dataset_path'], args['n_neighbors'], args['n_tables'], args['n_bits'])
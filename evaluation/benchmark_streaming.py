@@ -0,0 +1,110 @@
+import os
+import argparse
+import tracemalloc
+import warnings
+import numpy as np
+
+from time import time
+from pandas import DataFrame
+from sklearn.naive_bayes import GaussianNB
+from sklearn.linear_model import SGDClassifier
+from src.agents import Learner
+from src.data import StreamData
+from src.streaming import Stream
+
+warnings.filterwarnings("ignore")
+
+
+def benchmark(n_instances, n_features=20, n_learners=4, chunksize=1000, random_state=0):
+    """Stream synthetic datasets with an increasing number of rows and measure the peak
+    memory allocated while fitting and predicting one CV iteration.
+
+    Keyword arguments:
+        n_instances -- a list of numbers of rows
+        n_features -- number of features (default 20)
+        n_learners -- number of learners, alternately GaussianNB and SGDClassifier (default 4)
+        chunksize -- number of lines per chunk (default 1000)
+        random_state -- seed of the data and the folds (default 0)
+    """
+    os.makedirs('tests/benchmark', exist_ok=True)
+
+    rows = []
+
+    for n in n_instances:
+        filepath = 'tests/benchmark/streaming_{}.csv'.format(n)
+        random = np.random.RandomState(random_state)
+
+        y = random.randint(0, 3, n)
+        x = random.normal(size=(n, n_features)) + y[:, np.newaxis]
+        np.savetxt(filepath, np.column_stack((x, y)), delimiter=',', fmt='%.5f')
+
+        data = StreamData(filepath, chunksize=chunksize)
+
+        learners = []
+
+        for j, features in enumerate(np.array_split(np.arange(n_features), n_learners)):
+            learner = Learner(None, None, GaussianNB() if j % 2 == 0 else SGDClassifier(loss='log_loss'))
+            learner.features = features
+            learners.append(learner)
+
+        # Ten folds, as (train, validation, test) sorted indexes: 70%, 20% and 10%
+        parts = np.array_split(random.permutation(n), 10)
+        folds = [(np.sort(np.concatenate([parts[(f + k) % 10] for k in range(3, 10)])),
+                  np.sort(np.concatenate([parts[(f + 1) % 10], parts[(f + 2) % 10]])),
+                  np.sort(parts[f])) for f in range(10)]
+
+        stream = Stream(chunksize)
+
+        # Data's classes and folds' indexes are allocated before
+        tracemalloc.start()
+        start = time()
+
+        outputs = stream.run(data, learners, folds)
+
+        seconds = time() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        accuracy = np.mean([np.mean(outputs[f][0][0] == data.y[test_i]) for f, (_, _, test_i) in enumerate(folds)])
+
+        rows.append({'n_instances': n, 'chunksize': chunksize, 'seconds': seconds,
+                     'peak_bytes': peak, 'peak_bytes_per_chunk_row': peak / chunksize,
+                     'accuracy': accuracy})
+
+        del outputs
+        os.remove(filepath)
+
+    results = DataFrame(rows)
+    results['peak_growth'] = results['peak_bytes'] / results['peak_bytes'].iloc[0]
+
+    results.to_csv('tests/benchmark/streaming.csv', index=False)
+
+    print(results)
+
+    return results
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-n", "--n-instances",
+                        default="10000,20000,40000,80000",
+                        dest="n_instances",
+                        help="Numbers of rows, separated by commas.")
+
+    parser.add_argument("-c", "--chunksize",
+                        default=1000,
+                        type=int,
+                        dest="chunksize",
+                        help="Number of lines per chunk.")
+
+    parser.add_argument("-f", "--n-features",
+                        default=20,
+                        type=int,
+                        dest="n_features",
+                        help="Number of features.")
+
+    args = vars(parser.parse_args())
+
+    benchmark([int(n) for n in args['n_instances'].split(',')], args['n_features'], chunksize=args['chunksize'])
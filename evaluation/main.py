@@ -2,9 +2,26 @@ import os
 import json
 import argparse
 
+from glob import glob
+
 from theobserver import Observer
 from src.agents import Voter, Combiner, Mathematician
-from src.test import test, load_imports, split_parts, load_scorers, load_arbiters
+from src.preprocessing import load_preprocessor
+from src.warm_start import load_warm_start
+from src.binning import load_binner
+from src.approximation import load_svc_approximation
+from src.projection import load_projections
+from src.tuning import load_tuning
+from src.communication import load_communication
+from src.stragglers import load_stragglers
+from src.sites import load_sites
+from src.network import load_network
+from src.streaming import load_stream
+from src.cascade import load_cascade
+from src.pruning import load_pruning
+from src.online import load_online
+from src.test import test, load_imports, load_learners, split_parts, load_scorers, load_arbiters, load_hierarchy, \
+    aggregator_names, select_methods
 
 
 def get_class_column_by_name(name):
@@ -27,35 +44,51 @@ def get_dataset_name(path):
     return parts[-1]
 
 
+def get_existing_names(result_path):
+    files = glob('{}/cv_scores_*.csv'.format(result_path))
+    return [os.path.basename(f)[len('cv_scores_'):-len('.csv')] for f in files]
+
+
 def run_test(p):
+    # Select aggregation methods
+    done = get_existing_names(p['result_path']) if p.get('skip_existing', False) else []
+    existing = [name for name in aggregator_names(p) if name in done]
+
+    p = select_methods(p, p.get('include'), p.get('exclude'), done)
+
+    if len(aggregator_names(p)) == 0:
+        return
+
     # Evaluate classifiers
-    classifiers = load_imports(p['classifiers'])
+    classifiers, classif_names, classifier_ids = load_learners(p['classifiers'],
+                                                               p.get('n_learners'),
+                                                               p.get('learner_mix'),
+                                                               p['random_state'])
+    preprocessor = load_preprocessor(p.get('preprocessing'))
+    warm_start = load_warm_start(p.get('warm_start'))
+    binner = load_binner(p.get('binning'))
+    svc_approximation = load_svc_approximation(p.get('svc_approximation'))
+    projections = load_projections(p.get('projection'), classifier_ids)
+    tuner = load_tuning(p.get('tuning'), p['dataset'])
+    communication = load_communication(p.get('communication'))
+    stragglers = load_stragglers(p.get('stragglers'))
+    sites = load_sites(p.get('sites'))
+    network = load_network(p.get('network'), communication)
 
     # Evaluate metrics
     scorers = load_scorers(p['metrics'])
 
     # Evaluate aggregator
-    voter = Voter(list(p['voter'].values()))
-    combiner = Combiner(load_imports(p['combiner']))
-    mathematician = Mathematician(p['mathematician'])
-    arbiters = load_arbiters(p['arbiter'])
-
-    # Get names
-    mathematician_names = list()
-    for names in p['mathematician'].values():
-        mathematician_names += [name for name in names]
-
-    arbiter_names = []
-    arb_methods = list(p['arbiter']['methods'].keys())
-    for arb in arbiters:
-        for name in arb_methods:
-            arbiter_names.append(str(arb) + '_' + name)
+    input_mode = p.get('meta_input', 'proba')
 
-    classif_names = list(p['classifiers'].keys())
-    combiner_names = list(p['combiner'].keys())
-    voter_names = list(p['voter'].keys())
+    voter = Voter(list(p['voter'].values())) if len(p['voter']) > 0 else None
+    combiner = Combiner(load_imports(p['combiner']), input_mode) if len(p['combiner']) > 0 else None
+    mathematician = Mathematician(p['mathematician']) if len(p['mathematician']) > 0 else None
+    arbiters = load_arbiters(p['arbiter'], input_mode)
+    hierarchy = load_hierarchy(p.get('hierarchy'), input_mode)
 
-    names = classif_names + voter_names + combiner_names + arbiter_names + mathematician_names
+    # Get names
+    names = classif_names + aggregator_names(p)
 
     # Run test
     test(overlap=p['overlap'],
@@ -65,11 +98,30 @@ def run_test(p):
          random_state=p['random_state'],
          scorers=scorers,
          classifiers=classifiers,
+         classifier_ids=classifier_ids,
+         preprocessor=preprocessor,
+         warm_start=warm_start,
+         binner=binner,
+         svc_approximation=svc_approximation,
+         projections=projections,
+         tuner=tuner,
+         batch_aggregation=p.get('batch_aggregation', False),
+         communication=communication,
+         stragglers=stragglers,
+         sites=sites,
+         network=network,
+         row_shards=p.get('row_shards'),
+         stream=load_stream(p.get('streaming')),
+         cascade=load_cascade(p.get('cascade')),
+         pruner=load_pruning(p.get('pruning'), input_mode),
+         online=load_online(p.get('online')),
          voter=voter,
          arbiters=arbiters,
          combiner=combiner,
          mathematician=mathematician,
+         hierarchy=hierarchy,
          names=names,
+         existing=existing,
          results_path=p['result_path'])
 
 
@@ -90,10 +142,12 @@ def main(args):
     # Create test folder if not exists
     i = 0
     result_path = 'tests/{}_{}'.format(dataset_name[:-4], int(float(args['overlap']) * 10))
-    if os.path.exists(result_path):
+    skip_existing = args.get('skip_existing', False)
+
+    if os.path.exists(result_path) and not skip_existing:
         return
 
-    os.makedirs(result_path)
+    os.makedirs(result_path, exist_ok=True)
 
     # Load params and run test
     params = open(params_path, 'r')
@@ -107,6 +161,14 @@ def main(args):
     if args['overlap'] is not None:
         p['overlap'] = float(args['overlap'])
 
+    if args.get('include') is not None:
+        p['include'] = args['include'].split(',')
+
+    if args.get('exclude') is not None:
+        p['exclude'] = args['exclude'].split(',')
+
+    p['skip_existing'] = skip_existing
+
     # Save params
     file = open('{}/params.json'.format(result_path), 'w')
     json.dump(p, file)
@@ -134,6 +196,21 @@ if __name__ == "__main__":
                         dest="overlap",
                         help="\% of overlaped features, value between 0.0 and 1.0.")
 
+    parser.add_argument("-i", "--include",
+                        default=None,
+                        dest="include",
+                        help="Comma-separated aggregation methods' names (or patterns) to be run.")
+
+    parser.add_argument("-e", "--exclude",
+                        default=None,
+                        dest="exclude",
+                        help="Comma-separated aggregation methods' names (or patterns) not to be run.")
+
+    parser.add_argument("-s", "--skip-existing",
+                        action="store_true",
+                        dest="skip_existing",
+                        help="Run in an existing test folder, skipping methods already there.")
+
     # Validate params
     args = vars(parser.parse_args())
 
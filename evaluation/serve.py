@@ -0,0 +1,65 @@
+import signal
+import asyncio
+import argparse
+
+from src.ensemble import DistributedEnsemble
+from src.serving import PredictionServer
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-m", "--model",
+                        dest="model_path",
+                        help="Saved DistributedEnsemble's absolute/relative path.",
+                        required=True)
+
+    parser.add_argument("--host",
+                        default='127.0.0.1',
+                        dest="host",
+                        help="Host to listen on.")
+
+    parser.add_argument("--port",
+                        default=8000,
+                        type=int,
+                        dest="port",
+                        help="Port to listen on.")
+
+    parser.add_argument("-u", "--unix",
+                        default=None,
+                        dest="unix_path",
+                        help="Unix socket's path, instead of host and port.")
+
+    parser.add_argument("-b", "--max-batch-size",
+                        default=64,
+                        type=int,
+                        dest="max_batch_size",
+                        help="Maximum number of rows per micro-batch.")
+
+    parser.add_argument("-t", "--max-delay",
+                        default=2,
+                        type=float,
+                        dest="max_delay",
+                        help="Maximum milliseconds a request waits for its micro-batch.")
+
+    parser.add_argument("-c", "--cache-size",
+                        default=None,
+                        type=int,
+                        dest="cache_size",
+                        help="Rows cached per learner (default no cache).")
+
+    args = vars(parser.parse_args())
+
+    ensemble = DistributedEnsemble.load(args['model_path'])
+    server = PredictionServer(ensemble, args['max_batch_size'], args['max_delay'] / 1000,
+                              cache_size=args['cache_size'])
+
+    async def main():
+        # SIGHUP reloads the model in a thread, e.g. after it is saved again
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGHUP, lambda: asyncio.ensure_future(server.load(DistributedEnsemble.load, args['model_path'])))
+
+        await server.serve(args['host'], args['port'], args['unix_path'])
+
+    asyncio.run(main())
@@ -1,10 +1,34 @@
 import numpy as np
 
+from time import time
+from copy import deepcopy
+from sklearn.base import clone
+from sklearn.model_selection import KFold
+from .kemeny import kemeny
 from .metrics import score, join_ranks
 from social_choice.profile import Profile
 from .selectors import MetaDiff, MetaDiffInc, MetaDiffIncCorr
 
 
+def stack_inputs(y_proba, input_mode='proba'):
+    """Build a meta-classifier input from learners' probabilities.
+
+    Keyword arguments:
+        y_proba -- learners' probabilities, a list of (n_instances, n_classes) arrays
+        input_mode -- 'proba' to concatenate all learners' probabilities (n_learners * n_classes
+                      columns) or 'summary' for each class' mean and std over learners
+                      (2 * n_classes columns, whatever the number of learners) (default 'proba')
+    """
+    if input_mode == 'proba':
+        return np.hstack(y_proba)
+
+    if input_mode == 'summary':
+        proba = np.array(y_proba)
+        return np.hstack([proba.mean(axis=0), proba.std(axis=0)])
+
+    raise ValueError('{} is not a valid input mode.'.format(input_mode))
+
+
 class Learner():
 	"""Train a model given a classifier.
 
@@ -12,14 +36,56 @@ class Learner():
 		X -- a training set
         y -- a target set
         classifier -- An instance of a classifier from sklearn library*
+        preprocessor -- An instance of a transformer from sklearn library (default None)
+        Xt -- X transformed by the preprocessor for the current fold
+        features -- partition's features indexes in the dataset
+        warm_start -- a warm-start policy for the classifier (default None)
+        epochs -- epochs trained in the last fold when warm_start is set
+        binned -- a shared binned matrix of all features for the current fold (default None)
+        approximation -- a SVCApproximation policy for large partitions (default None)
+        n_shards -- split the training rows in shards, each one with its own model (default None)
+        shards -- each shard's fitted model, when n_shards is set
+        fit_seconds -- seconds spent by the last fit_fold
+        predict_seconds -- seconds spent by the last evaluate
 
     *The classifier should implement fit(), predict() and predict_proba().
     See the sklearn documentation for more information...
 	"""
-	def __init__(self, X, y, classifier):
+	def __init__(self, X, y, classifier, preprocessor=None):
 		self.X = X
 		self.y = y
 		self.classifier = classifier
+		self.preprocessor = preprocessor
+		self.Xt = X
+		self.features = None
+		self.warm_start = None
+		self.epochs = None
+		self.binned = None
+		self.approximation = None
+		self.n_shards = None
+		self.shards = []
+		self.fit_seconds = 0
+		self.predict_seconds = 0
+
+	def prepare(self, train_i):
+		"""Fit the preprocessor on the training rows and return the transformed data.
+
+		The transformed matrix is cached in Xt and used by fit and evaluate,
+		so the preprocessor is fitted only once per (fold, partition). When
+		binned is set, the partition's columns are selected from it instead.
+
+		Keyword arguments:
+			train_i -- training instances' indexes
+		"""
+		if self.binned is not None:
+			self.Xt = self.binned[:, self.features]
+		elif self.preprocessor is None:
+			self.Xt = self.X
+		else:
+			self.preprocessor.fit(self.X[train_i, :])
+			self.Xt = self.preprocessor.transform(self.X)
+
+		return self.Xt
 
 	def fit(self, X=None, y=None):
 		"""Fit the model using the class dataset and classifier.
@@ -36,20 +102,87 @@ class Learner():
 
 		self.classifier.fit(X, y)
 
+	def fit_fold(self, fold):
+		"""Preprocess the partition and fit the model on a fold's training rows.
+
+		Keyword arguments:
+			fold -- (train, validation, test) instances' indexes
+		"""
+		train_i, val_i, _ = fold
+		start = time()
+
+		X = self.prepare(train_i)
+
+		x_train = X[train_i, :]
+		y_train = self.y[train_i]
+
+		if self.n_shards is not None:
+			self.fit_shards(x_train, y_train)
+			self.fit_seconds = time() - start
+			return
+
+		if self.approximation is not None:
+			self.classifier = self.approximation.select(self.classifier, len(train_i))
+
+		if self.warm_start is None:
+			self.fit(x_train, y_train)
+		else:
+			self.classifier, self.epochs = self.warm_start.fit(self.classifier,
+															   x_train, y_train,
+															   X[val_i, :], self.y[val_i],
+															   self.features,
+															   np.unique(self.y))
+
+		self.fit_seconds = time() - start
+
+	def fit_shards(self, X, y):
+		"""Split the training rows in n_shards stratified shards and fit a model on each one.
+
+		Keyword arguments:
+			X -- training set
+			y -- target set
+		"""
+		# Deal each class' rows to the shards in turn
+		order = np.argsort(y, kind='stable')
+		self.shards = []
+
+		for s in range(self.n_shards):
+			rows = order[s::self.n_shards]
+			classifier = self.classifier
+
+			if self.approximation is not None:
+				classifier = self.approximation.select(classifier, len(rows))
+
+			self.shards.append(clone(classifier).fit(X[rows, :], y[rows]))
+
 	def predict(self, X):
 		"""Predict classes for the testset on dataset and returns a ndarray as result.
 
 		Keyword arguments:
 			X -- data to be predicted
 		"""
+		if self.n_shards is not None:
+			return np.unique(self.y)[self.predict_proba(X).argmax(axis=1)]
+
 		return self.classifier.predict(X)
 
 	def predict_proba(self, X):
 		"""Predict the probabilities for the testset on dataset and returns a ndarray as result.
 
+		With shards, it is the mean of the shards' probabilities over all classes.
+
 		Keyword arguments:
 			X -- data to be predicted
 		"""
+		if self.n_shards is not None:
+			classes = np.unique(self.y)
+			proba = np.zeros((X.shape[0], len(classes)))
+
+			for shard in self.shards:
+				proba[:, np.searchsorted(classes, shard.classes_)] += shard.predict_proba(X)
+
+			return proba / len(self.shards)
+
 		return self.classifier.predict_proba(X)
 
 	def evaluate(self, fold, scoring={}):
@@ -64,25 +197,38 @@ class Learner():
 		# x_train = self.X[train_i, :]
 		# y_train = self.y[train_i]
 
-		x_val = self.X[val_i, :]
+		x_val = self.Xt[val_i, :]
 		# y_val = self.y[val_i]
 
-		x_test = self.X[test_i, :]
+		x_test = self.Xt[test_i, :]
 		y_test = self.y[test_i]
 
 		# self.fit(x_train, y_train)
+		start = time()
 
 		y_pred = self.predict(x_test)
 		y_proba_val = self.predict_proba(x_val)
 		y_proba_test = self.predict_proba(x_test)
 
+		self.predict_seconds = time() - start
+
 		metrics = score(y_test, y_pred, scoring)
 
 		return y_pred, y_proba_val, y_proba_test, metrics
 
 
 class Aggregator():
-    """Aggregate classifiers predictions."""
+    """Aggregate classifiers predictions.
+
+    Properties:
+        stateless -- if each instance is aggregated independently of the others,
+                     so many folds can be aggregated at once (default False)
+        trained -- if it trains a model on the learners' outputs, so it needs the
+                   same learners to predict (default False)
+    """
+
+    stateless = False
+    trained = False
 
     def __init__(self, methods=[]):
         """Set properties.
@@ -99,13 +245,21 @@ class Aggregator():
 class Voter(Aggregator):
     """Aggregate classifiers predictions by voting."""
 
-    def __init__(self, methods=[]):
+    def __init__(self, methods=[], kemeny_threshold=6):
         """Set properties.
 
         Keyword arguments:
             methods -- social choice function's methods
+            kemeny_threshold -- maximum number of classes for the exact Kemeny solver (default 6)
         """
         self.methods = methods
+        self.kemeny_threshold = kemeny_threshold
+
+    @property
+    def stateless(self):
+        """Only Kemeny and plurality rank each instance's classes independently.
+        The other social choice functions rank instances among themselves."""
+        return set(self.methods) <= {'kemeny', 'plurality'}
 
     def aggr(self, **kwargs):
         """Aggregate probabilities and return aggregated ranks and scores.
@@ -124,7 +278,8 @@ class Voter(Aggregator):
 
         # rankings = a rank by class by social choice function
         plurality = 'plurality'
-        methods = self.methods
+        kemeny_young = 'kemeny'
+        methods = [m for m in self.methods if m != kemeny_young]
         class_ranks = dict()
         scores = dict()
         ranks = dict()
@@ -132,8 +287,14 @@ class Voter(Aggregator):
         n_learners = len(y_proba)        # # of learners = length of proba
         _, n_classes = y_proba[0].shape  # # of classes = # of columns
 
+        if kemeny_young in self.methods:
+            winners = kemeny(y_proba, self.kemeny_threshold)[:, 0]
+
+            ranks[kemeny_young] = winners
+            scores[kemeny_young] = score(y_true, winners, scoring)
+
         if plurality in self.methods:
-            methods = list(set(self.methods) - {plurality})
+            methods = [m for m in methods if m != plurality]
 
             sc_ranks = Profile.plurality(y_proba, y_pred)
 
@@ -162,12 +323,28 @@ class Voter(Aggregator):
             ranks[k] = winners   # save ranks
             scores[k] = metrics  # save scores
 
+        # Keep methods' order, as it is used to name results
+        ranks = {k: ranks[k] for k in self.methods}
+        scores = {k: scores[k] for k in self.methods}
+
         return ranks, scores
 
 
 class Combiner(Aggregator):
     """Aggregate classifiers predictions by training another classifier (combiner)."""
 
+    trained = True
+
+    def __init__(self, methods=[], input_mode='proba'):
+        """Set properties.
+
+        Keyword arguments:
+            methods -- a list of classifiers
+            input_mode -- combiner's input, see stack_inputs (default 'proba')
+        """
+        self.input_mode = input_mode
+        super().__init__(methods)
+
     def aggr(self, **kwargs):
         """Aggregate probabilities and return aggregated ranks and scores.
 
@@ -177,35 +354,30 @@ class Combiner(Aggregator):
             testset -- test instances
             y_true -- true classes (for score)
             scoring -- a dict of scorers (default {})
+            refit -- fit the combiners on x, or reuse the last fit (default True)
         """
         # Get params
-        x = kwargs['x']
-        y = kwargs['y']
         testset = kwargs['testset']
         y_true = kwargs['y_true']
         scoring = kwargs.get('scoring', {})
-
-        # Prep X
-        n = len(x)
-        X = x[0]
-
-        for i in range(1, n):
-            X = np.append(X, x[i], axis=1)
+        refit = kwargs.get('refit', True)
 
         # Prep testset
-        n = len(testset)
-        test = testset[0]
-
-        for i in range(1, n):
-            test = np.append(test, testset[i], axis=1)
+        test = stack_inputs(testset, self.input_mode)
 
         n = len(self.methods)
         predictions = dict()
         scores = dict()
 
         # For each combiner...
+        if refit:
+            X = stack_inputs(kwargs['x'], self.input_mode)
+            y = kwargs['y']
+
         for i in range(n):
-            self.methods[i].fit(X, y)
+            if refit:
+                self.methods[i].fit(X, y)
+
             y_pred = self.methods[i].predict(test)
 
             k = 'cmb_' + str(i)
@@ -218,14 +390,19 @@ class Combiner(Aggregator):
 
 class Arbiter(Aggregator):
 
-    def __init__(self, selection_rule, methods=[]):
+    trained = True
+
+    def __init__(self, selection_rule, methods=[], input_mode='proba'):
         """Sets the selection rule to be used.
 
         Keyword arguments:
             selection_rule -- SelectionRule object
             methods -- a list of classifiers (default [])
+            input_mode -- arbiter's input, see stack_inputs (default 'proba')
         """
         self.selection_rule = selection_rule
+        self.input_mode = input_mode
+        self.fitted = []
         super().__init__(methods)
 
     def aggr(self, **kwargs):
@@ -240,46 +417,35 @@ class Arbiter(Aggregator):
             testset -- test instances
             test_i -- test instance indexes
             scoring -- a dict of scorers (default {})
+            refit -- fit the methods on x, or reuse the last fit (default True)
         """
         # Get params
-        learners = kwargs['learners']
-        y_proba = kwargs['x']
-        y_train = kwargs['y']
         y_true = kwargs['y_true']
         base_pred = kwargs['y_pred']
         testset = kwargs['testset']
         scoring = kwargs.get('scoring', {})
+        refit = kwargs.get('refit', True)
 
-        # Prep testset
-        n = len(testset)
-        test = testset[0]
-
-        for i in range(1, n):
-            test = np.append(test, testset[i], axis=1)
+        # Prep testset and trainingset
+        test = stack_inputs(testset, self.input_mode)
 
         n = len(self.methods)
-        n_classes = len(set(y_true))
-        n_learners = len(learners)
-        n_instances = y_proba[0].shape[0]
-
-        # Prep trainingset
-        x = np.zeros((n_instances, n_classes))
-
-        for i in range(n_learners):
-            x = np.append(x, y_proba[i], axis=1)
-
-        x = x[:, n_classes:]
 
         predictions = dict()
         scores = dict()
 
-        selection = self.selection_rule.select(base_pred, y_true)
-        xt, yt = self.get_from_selection(x, y_train, selection)
+        if refit:
+            x = stack_inputs(kwargs['x'], self.input_mode)
+            y_train = kwargs['y']
+
+            selection = self.selection_rule.select(base_pred, y_true)
+            xt, yt = self.get_from_selection(x, y_train, selection)
+
+            self.fitted = [self.fit(xt, yt, self.methods[i], x, y_train) for i in range(n)]
 
         # For each method...
         for i in range(n):
-            method = self.fit(xt, yt, self.methods[i], x, y_train)
-            y_pred = self.predict(test, method)
+            y_pred = self.predict(test, self.fitted[i])
 
             k = str(self) + '_' + str(i)
 
@@ -308,8 +474,8 @@ class Arbiter(Aggregator):
 
 class ArbiterMetaDiff(Arbiter):
 
-    def __init__(self, methods=[]):
-        super().__init__(MetaDiff(), methods)
+    def __init__(self, methods=[], input_mode='proba'):
+        super().__init__(MetaDiff(), methods, input_mode)
 
     def get_from_selection(self, x, y_train, selection):
         x_indices = selection[0]
@@ -326,8 +492,8 @@ class ArbiterMetaDiff(Arbiter):
 
 class ArbiterMetaDiffInc(Arbiter):
 
-    def __init__(self, methods=[]):
-        super().__init__(MetaDiffInc(), methods)
+    def __init__(self, methods=[], input_mode='proba'):
+        super().__init__(MetaDiffInc(), methods, input_mode)
 
     def get_from_selection(self, x, y_train, selection):
         x_indices = selection[0].union(selection[1])
@@ -344,8 +510,8 @@ class ArbiterMetaDiffInc(Arbiter):
 
 class ArbiterMetaDiffIncCorr(Arbiter):
 
-    def __init__(self, methods=[]):
-        super().__init__(MetaDiffIncCorr(), methods)
+    def __init__(self, methods=[], input_mode='proba'):
+        super().__init__(MetaDiffIncCorr(), methods, input_mode)
 
     def get_from_selection(self, x, y_train, selection):
         n = len(selection)
@@ -385,6 +551,8 @@ class ArbiterMetaDiffIncCorr(Arbiter):
 class Mathematician(Aggregator):
     """Aggregate classifiers prediction by average."""
 
+    stateless = True
+
     def aggr(self, **kwargs):
         """Aggregate probabilities and return aggregated ranks and scores.
 
@@ -402,29 +570,164 @@ class Mathematician(Aggregator):
         results = dict()
         scores = dict()
 
-        n_learners = len(y_proba)        # # of learners = length of proba
-        _, n_classes = y_proba[0].shape  # # of classes = # of columns
+        # (n_learners, n_instances, n_classes)
+        proba = np.array(y_proba)
+
+        for aux, operations in self.methods.items():
 
-        methods = self.methods.items()
+            for op in operations:
+                results[op] = eval('np.{}(proba, axis=0)'.format(op))
+                predictions[op] = eval('results[op].arg{}(axis=1)'.format(aux))
+                scores[op] = score(y_true, predictions[op], scoring)
 
-        for c in range(n_classes):
-            # Get class c's probabilities
-            proba = [y_proba[i][:, c] for i in range(n_learners)]
-            proba = np.array(proba)
+        return predictions, scores
 
-            for _, operations in methods:
 
-                for op in operations:
-                    result = eval('np.{}(proba, axis=0)'.format(op))
+class Hierarchy(Aggregator):
+    """Aggregate classifiers predictions in two levels.
 
-                    results.setdefault(op, [])
-                    results[op].append(result)
+    Description:
+        Learners are grouped in clusters and each cluster is aggregated by its own copy of
+        the cluster aggregator. The clusters' predictions, as one-hot probabilities, are
+        aggregated by the root aggregator. A trained root is fitted on the clusters'
+        validation predictions, which are out-of-fold when the cluster aggregator is
+        trained. Each level's input width and time are saved in reports.
+    """
 
-        for aux, operations in methods:
+    # Learners' outputs, to be split by cluster
+    per_learner = ('y_pred', 'y_proba', 'x', 'testset', 'learners')
 
-            for op in operations:
-                results[op] = np.array(results[op])
-                predictions[op] = eval('results[op].arg{}(axis=0)'.format(aux))
-                scores[op] = score(y_true, predictions[op], scoring)
+    def __init__(self, cluster, root, n_clusters, cv=5):
+        """Set properties.
+
+        Keyword arguments:
+            cluster -- an Aggregator for each cluster (the first result is used)
+            root -- an Aggregator for the clusters' predictions
+            n_clusters -- number of clusters
+            cv -- folds of the validation instances to predict them with a trained cluster
+                  aggregator fitted on the other folds (default 5)
+        """
+        self.cluster = cluster
+        self.root = root
+        self.n_clusters = n_clusters
+        self.cv = cv
+        self.clusters = []
+        self.reports = dict()
+
+        super().__init__([])
+
+    @property
+    def stateless(self):
+        return self.cluster.stateless and self.root.stateless
+
+    @property
+    def trained(self):
+        return self.cluster.trained or self.root.trained
+
+    def aggr(self, **kwargs):
+        """Aggregate probabilities and return aggregated ranks and scores.
+
+        Keyword arguments:
+            the same as the cluster and root aggregators'
+            refit -- fit each cluster's aggregator and the root, or reuse the last fit (default True)
+            report -- save the levels' width and time in reports (default True)
+        """
+        testset = kwargs['testset']
+        n_learners = len(testset)
+        _, n_classes = testset[0].shape
+        refit = kwargs.get('refit', True)
+
+        clusters = np.array_split(np.arange(n_learners), min(self.n_clusters, n_learners))
+
+        if refit:
+            self.clusters = [deepcopy(self.cluster) for _ in clusters]
+        elif len(self.clusters) != len(clusters):
+            raise ValueError('Hierarchy was fitted with {} clusters, got {}.'.format(len(self.clusters), len(clusters)))
+
+        cluster_pred = []
+        cluster_test = []
+        cluster_val = []
+        cluster_times = []
+        val_times = []
+
+        for c, members in enumerate(clusters):
+            if refit:
+                sub = {k: [v[i] for i in members] if k in self.per_learner else v for k, v in kwargs.items()}
+            else:
+                # Only the test outputs are needed, e.g., imputed for missing learners
+                test = [testset[i] for i in members]
+                sub = dict(kwargs, y_proba=test, testset=test, y_pred=[proba.argmax(axis=1) for proba in test],
+                           learners=list(members))
+
+            sub['scoring'] = {}
+
+            # Validation outputs, for a trained root
+            if refit and self.root.trained:
+                t = time()
+                cluster_val.append(np.eye(n_classes)[self.__validation(sub, kwargs['y'])])
+                val_times.append(time() - t)
+
+            t = time()
+            y_pred = self.__first(self.clusters[c].aggr(**sub))
+            cluster_times.append(time() - t)
+
+            cluster_pred.append(y_pred)
+            cluster_test.append(np.eye(n_classes)[y_pred])
+
+        root = dict(kwargs, y_pred=cluster_pred, y_proba=cluster_test, testset=cluster_test, learners=clusters)
+
+        if refit and self.root.trained:
+            root['x'] = cluster_val
+
+        t = time()
+        predictions, scores = self.root.aggr(**root)
+        root_time = time() - t
+
+        if kwargs.get('report', True):
+            self.reports.setdefault('hierarchy', [])
+            self.reports['hierarchy'].append({'n_clusters': len(clusters),
+                                              'cluster_width': max(len(m) for m in clusters) * n_classes,
+                                              'root_width': len(clusters) * n_classes,
+                                              'cluster_seconds_max': max(cluster_times),
+                                              'cluster_seconds_total': sum(cluster_times),
+                                              'cluster_validation_seconds': sum(val_times),
+                                              'root_seconds': root_time})
+
+        predictions = {'hier_' + k: v for k, v in predictions.items()}
+        scores = {'hier_' + k: v for k, v in scores.items()}
 
         return predictions, scores
+
+    def __validation(self, sub, y):
+        """Return a cluster's predictions of the validation instances.
+
+        A trained cluster aggregator predicts each of cv folds of the validation
+        instances after being fitted on the others, so the root is not trained on
+        in-sample predictions.
+        """
+        rows = np.arange(len(y))
+
+        if not self.cluster.trained:
+            return self.__predict_rows(self.cluster, sub, y, rows, rows)
+
+        y_val = np.zeros(len(y), dtype=int)
+
+        for train_i, test_i in KFold(self.cv, shuffle=True, random_state=0).split(rows):
+            y_val[test_i] = self.__predict_rows(deepcopy(self.cluster), sub, y, train_i, test_i)
+
+        return y_val
+
+    def __predict_rows(self, aggregator, sub, y, train_i, test_i):
+        """Fit a cluster's aggregator on some validation rows and return its predictions of others."""
+        x = sub['x']
+        test = [proba[test_i] for proba in x]
+
+        return self.__first(aggregator.aggr(**dict(sub, x=[proba[train_i] for proba in x], y=y[train_i],
+                                                   y_proba=test, testset=test, y_true=y[test_i],
+                                                   y_pred=[proba.argmax(axis=1) for proba in test],
+                                                   refit=True, report=False)))
+
+    @staticmethod
+    def __first(results):
+        predictions, _ = results
+        return np.asarray(next(iter(predictions.values())), dtype=int)
@@ -0,0 +1,106 @@
+import numpy as np
+
+from sklearn.svm import SVC, LinearSVC
+from sklearn.pipeline import make_pipeline
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+
+
+class ApproximateSVC(BaseEstimator, ClassifierMixin):
+    """Approximate a RBF kernel SVC by a kernel feature map and a calibrated linear SVM.
+
+    Properties:
+        kernel -- feature map, 'nystroem' or 'rff' (random Fourier features) (default 'nystroem')
+        n_components -- dimension of the feature map (default 300)
+        gamma -- RBF kernel coefficient, 'scale' or float (default 'scale')
+        C -- regularization parameter (default 1.0)
+        random_state -- seed of the feature map (default None)
+    """
+
+    def __init__(self, kernel='nystroem', n_components=300, gamma='scale', C=1.0, random_state=None):
+        self.kernel = kernel
+        self.n_components = n_components
+        self.gamma = gamma
+        self.C = C
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        """Fit the feature map and the calibrated linear classifier.
+
+        Keyword arguments:
+            X -- training set
+            y -- target set
+        """
+        X = np.asarray(X, dtype=np.float64)
+        gamma = self.gamma
+
+        if gamma == 'scale':
+            var = X.var()
+            gamma = 1.0 / (X.shape[1] * var) if var > 0 else 1.0
+
+        n_components = min(self.n_components, X.shape[0])
+
+        if self.kernel == 'nystroem':
+            feature_map = Nystroem(gamma=gamma, n_components=n_components, random_state=self.random_state)
+        elif self.kernel == 'rff':
+            feature_map = RBFSampler(gamma=gamma, n_components=n_components, random_state=self.random_state)
+        else:
+            raise ValueError('{} is not a valid kernel approximation.'.format(self.kernel))
+
+        self.model_ = make_pipeline(feature_map, CalibratedClassifierCV(LinearSVC(C=self.C), cv=3))
+        self.model_.fit(X, y)
+        self.classes_ = self.model_.classes_
+
+        return self
+
+    def predict(self, X):
+        return self.model_.predict(np.asarray(X, dtype=np.float64))
+
+    def predict_proba(self, X):
+        return self.model_.predict_proba(np.asarray(X, dtype=np.float64))
+
+
+class SVCApproximation():
+    """Replace SVC learners by an ApproximateSVC on partitions with many training rows.
+
+    Properties:
+        threshold -- minimum number of training rows to approximate (default 20000)
+        kernel -- feature map, 'nystroem' or 'rff' (default 'nystroem')
+        n_components -- dimension of the feature map (default 300)
+        compare -- also fit the exact SVC on each seed's first fold to compare accuracy (default False)
+    """
+
+    def __init__(self, threshold=20000, kernel='nystroem', n_components=300, compare=False):
+        self.threshold = threshold
+        self.kernel = kernel
+        self.n_components = n_components
+        self.compare = compare
+
+    def select(self, classifier, n_rows):
+        """Return the classifier to be fitted on n_rows training rows.
+
+        Keyword arguments:
+            classifier -- the learner's classifier
+            n_rows -- number of training rows
+        """
+        if type(classifier) is not SVC or n_rows <= self.threshold:
+            return classifier
+
+        return ApproximateSVC(kernel=self.kernel,
+                              n_components=self.n_components,
+                              gamma=classifier.gamma,
+                              C=classifier.C,
+                              random_state=classifier.random_state)
+
+
+def load_svc_approximation(params):
+    """Return a SVCApproximation from the params' dict or None if there is no approximation.
+
+    Keyword arguments:
+        params -- a dict as {"threshold": int, "kernel": str, "n_components": int, "compare": bool}
+    """
+    if params is None:
+        return None
+
+    return SVCApproximation(**params)
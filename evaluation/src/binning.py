@@ -0,0 +1,65 @@
+import numpy as np
+
+
+class Binner():
+    """Quantize features into ordinal bins.
+
+    Description:
+        Bin edges are the quantiles of each feature on the training rows, so each
+        feature is mapped into at most max_bins bins and stored as a uint8 matrix.
+        Tree learners train on the bin codes instead of the raw values, so each split
+        searches at most max_bins - 1 thresholds per feature. The tree still converts
+        its partition's codes to float32 when fitting, so it takes no less memory.
+
+    Properties:
+        max_bins -- maximum number of bins per feature, between 2 and 256 (default 255)
+        bin_edges -- a list of bin edges for each feature
+    """
+
+    def __init__(self, max_bins=255):
+        if not 2 <= max_bins <= 256:
+            raise ValueError('max_bins should be between 2 and 256, got {}.'.format(max_bins))
+
+        self.max_bins = max_bins
+        self.bin_edges = None
+
+    def fit(self, X):
+        """Compute the bin edges of each feature.
+
+        Keyword arguments:
+            X -- training set
+        """
+        X = np.asarray(X, dtype=np.float64)
+
+        percentiles = np.linspace(0, 100, self.max_bins + 1)[1:-1]
+        edges = np.percentile(X, percentiles, axis=0)
+
+        self.bin_edges = [np.unique(edges[:, i]) for i in range(X.shape[1])]
+
+        return self
+
+    def transform(self, X):
+        """Return X's bin codes as a uint8 matrix.
+
+        Keyword arguments:
+            X -- data to be binned
+        """
+        X = np.asarray(X, dtype=np.float64)
+        binned = np.empty(X.shape, dtype=np.uint8)
+
+        for i, edges in enumerate(self.bin_edges):
+            binned[:, i] = np.searchsorted(edges, X[:, i], side='right')
+
+        return binned
+
+
+def load_binner(params):
+    """Return a Binner from the params' dict or None if there is no binning.
+
+    Keyword arguments:
+        params -- a dict as {"max_bins": int}
+    """
+    if params is None:
+        return None
+
+    return Binner(**params)
@@ -0,0 +1,92 @@
+import numpy as np
+
+from hashlib import blake2b
+from threading import Lock
+from collections import OrderedDict
+
+
+class PredictionCache():
+    """A bounded LRU cache of a learner's probabilities, keyed by a hash of its partition's rows.
+
+    Description:
+        Rows found in the cache, or repeated in the same batch, are not predicted.
+        When more than max_size rows are cached, the least recently used are evicted.
+
+    Properties:
+        max_size -- maximum number of cached rows (default 10000)
+        hits -- rows not predicted
+        misses -- rows predicted
+        evictions -- rows evicted
+    """
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.__entries = OrderedDict()
+        self.__lock = Lock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def predict_proba(self, x, predict_proba):
+        """Return the probabilities of a batch, predicting only the rows not cached.
+
+        Keyword arguments:
+            x -- a batch with the partition's features
+            predict_proba -- a function that returns the probabilities of some rows of x
+        """
+        x = np.ascontiguousarray(x)
+        keys = [blake2b(row.tobytes(), digest_size=16).digest() for row in x]
+
+        proba = [None] * len(keys)
+        missing = OrderedDict()
+
+        with self.__lock:
+            for i, key in enumerate(keys):
+                if key in self.__entries:
+                    self.__entries.move_to_end(key)
+                    proba[i] = self.__entries[key]
+                    self.hits += 1
+                elif key in missing:
+                    missing[key].append(i)
+                    self.hits += 1
+                else:
+                    missing[key] = [i]
+                    self.misses += 1
+
+        if len(missing) > 0:
+            computed = predict_proba(x[[rows[0] for rows in missing.values()], :])
+
+            with self.__lock:
+                for (key, rows), row_proba in zip(missing.items(), computed):
+                    row_proba = row_proba.copy()
+
+                    for i in rows:
+                        proba[i] = row_proba
+
+                    self.__entries[key] = row_proba
+                    self.__entries.move_to_end(key)
+
+                while len(self.__entries) > self.max_size:
+                    self.__entries.popitem(last=False)
+                    self.evictions += 1
+
+        return np.vstack(proba)
+
+    def clear(self):
+        """Invalidate every cached row."""
+        with self.__lock:
+            self.__entries.clear()
+
+    def metrics(self):
+        """Return size, hits, misses, hit rate and evictions as a dict."""
+        n = self.hits + self.misses
+
+        return {'size': len(self),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / n if n > 0 else 0.0,
+                'evictions': self.evictions}
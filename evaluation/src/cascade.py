@@ -0,0 +1,60 @@
+import numpy as np
+
+from .selectors import SelectionRule
+
+
+class Cascade():
+    """Early-exit inference: the cheapest learners first, the others only when they disagree.
+
+    Description:
+        The n_first learners with the lowest cost predict every instance. Instances on
+        which a majority of them agree exit with the majority class. Only the others
+        are predicted by the remaining learners and the arbiter.
+
+    Properties:
+        n_first -- number of learners queried first (default 3)
+    """
+
+    def __init__(self, n_first=3):
+        self.n_first = n_first
+
+    def first(self, costs):
+        """Return the indexes of the cheapest learners, from the cheapest.
+
+        Keyword arguments:
+            costs -- each learner's cost
+        """
+        return np.argsort(costs, kind='stable')[:self.n_first]
+
+    def exit(self, y_pred):
+        """Return (if each instance exits early, majority class) from the first learners' predictions.
+
+        Keyword arguments:
+            y_pred -- the first learners' predictions
+        """
+        return SelectionRule.vote(y_pred)
+
+    def cost_ratio(self, costs, arbiter_cost, early):
+        """Return the cascade's cost over the cost of querying every learner and the arbiter.
+
+        Keyword arguments:
+            costs -- each learner's cost per instance
+            arbiter_cost -- arbiter's cost per instance
+            early -- fraction of instances that exit early
+        """
+        full = np.sum(costs) + arbiter_cost
+        first = np.sum(np.asarray(costs)[self.first(costs)])
+
+        return (early * first + (1 - early) * full) / full
+
+
+def load_cascade(params):
+    """Return a Cascade from the params' dict or None if there is no cascade.
+
+    Keyword arguments:
+        params -- a dict as {"n_first": int}
+    """
+    if params is None:
+        return None
+
+    return Cascade(**params)
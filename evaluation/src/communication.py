@@ -0,0 +1,131 @@
+import numpy as np
+
+from .agents import Voter, Combiner, Arbiter, Hierarchy
+
+
+class Communication():
+    """Model what learners send to the aggregators and compress their probabilities.
+
+    Description:
+        Learners send labels (1 byte per instance, 2 if there are more than 256 classes)
+        and/or probability vectors, whose size depends on the compression:
+            none -- float64 probabilities (8 bytes per class)
+            float16 -- float16 probabilities (2 bytes per class)
+            uint8 -- probabilities quantized in 8 bits (1 byte per class)
+            topk -- the k highest probabilities as float16 and their classes' indexes
+                    (k * (2 + 1) bytes), the others are received as 0
+
+    Properties:
+        compression -- {'none', 'float16', 'uint8', 'topk'} (default 'none')
+        k -- number of classes sent by topk (default 1)
+    """
+
+    compressions = ('none', 'float16', 'uint8', 'topk')
+
+    def __init__(self, compression='none', k=1):
+        if compression not in self.compressions:
+            raise ValueError('{} is not a valid compression.'.format(compression))
+
+        self.compression = compression
+        self.k = k
+
+    def compress(self, proba):
+        """Return the probabilities as received by the aggregator.
+
+        Keyword arguments:
+            proba -- a (n_instances, n_classes) array
+        """
+        if self.compression == 'float16':
+            return proba.astype(np.float16).astype(np.float64)
+
+        if self.compression == 'uint8':
+            return np.round(proba * 255) / 255
+
+        if self.compression == 'topk':
+            k = min(self.k, proba.shape[1])
+            top = np.argpartition(-proba, k - 1, axis=1)[:, :k]
+            rows = np.arange(proba.shape[0])[:, None]
+
+            received = np.zeros(proba.shape)
+            received[rows, top] = proba[rows, top].astype(np.float16)
+
+            return received
+
+        return proba
+
+    def proba_bytes(self, n_instances, n_classes):
+        """Bytes of n_instances probability vectors."""
+        if self.compression == 'float16':
+            return n_instances * n_classes * 2
+
+        if self.compression == 'uint8':
+            return n_instances * n_classes
+
+        if self.compression == 'topk':
+            return n_instances * min(self.k, n_classes) * (2 + self.label_size(n_classes))
+
+        return n_instances * n_classes * 8
+
+    def label_bytes(self, n_instances, n_classes):
+        """Bytes of n_instances labels."""
+        return n_instances * self.label_size(n_classes)
+
+    def bytes(self, aggregator, n_val, n_test, n_classes):
+        """Bytes a learner sends to an aggregator in a fold.
+
+        Keyword arguments:
+            aggregator -- an Aggregator
+            n_val -- number of validation instances
+            n_test -- number of test instances
+            n_classes -- number of classes
+        """
+        needs = payload(aggregator)
+        total = 0
+
+        if 'labels' in needs:
+            total += self.label_bytes(n_test, n_classes)
+
+        if 'proba' in needs:
+            total += self.proba_bytes(n_test, n_classes)
+
+        if 'val_proba' in needs:
+            total += self.proba_bytes(n_val, n_classes)
+
+        return total
+
+    @staticmethod
+    def label_size(n_classes):
+        return 1 if n_classes <= 256 else 2
+
+
+def payload(aggregator):
+    """Return what each learner sends to an aggregator, a set of {'labels', 'proba', 'val_proba'}.
+
+    Keyword arguments:
+        aggregator -- an Aggregator
+    """
+    if isinstance(aggregator, Hierarchy):
+        return payload(aggregator.cluster)
+
+    if isinstance(aggregator, Voter):
+        return {'labels'} if set(aggregator.methods) <= {'plurality'} else {'proba'}
+
+    if isinstance(aggregator, Combiner):
+        return {'proba', 'val_proba'}
+
+    if isinstance(aggregator, Arbiter):
+        return {'labels', 'proba', 'val_proba'}
+
+    return {'proba'}
+
+
+def load_communication(params):
+    """Return a Communication from the params' dict or None if there is no accounting.
+
+    Keyword arguments:
+        params -- a dict as {"compression": str, "k": int}
+    """
+    if params is None:
+        return None
+
+    return Communication(**params)
@@ -1,4 +1,4 @@
-from pandas import read_csv
+from pandas import read_csv, concat
 from sklearn.preprocessing import LabelEncoder
 
 
@@ -53,17 +53,84 @@ class Data():
 
     @staticmethod
     def __has_header(filepath):
-        file = open(filepath, 'r')
-        line = file.readline()
-        file.close()
-
-        try:
-            line = [float(n) for n in line.split(',')]
-            return None
-        except ValueError:
-            return 0
+        return has_header(filepath)
 
     def __discretize(self, y):
         encoder = LabelEncoder()
         self.y = encoder.fit_transform(y)
         self.classes = encoder.classes_
+
+
+class StreamData():
+    """Represent the data of a CSV file read in chunks.
+
+    Description:
+        Only the classes are kept in memory. The attributes are read in chunks
+        of chunksize lines, so memory is bounded by the chunk's size.
+
+    Properties:
+        x -- always None, use chunks
+        y -- instances' classes (ndarray)
+    """
+
+    def __init__(self, filepath, class_column=-1, chunksize=10000):
+        """Read the class column.
+
+        Keyword arguments:
+            filepath -- file's absolute/relative path
+            class_column -- number of the class column [0 -> first column, (default -1) -> last column]
+            chunksize -- number of lines per chunk (default 10000)
+        """
+        self.filepath = filepath
+        self.chunksize = chunksize
+        self.x = None
+
+        self.__header = has_header(filepath)
+
+        with open(filepath, 'r') as file:
+            n_columns = len(file.readline().split(','))
+
+        self.__class_column = class_column % n_columns
+        self.__columns = [c for c in range(n_columns) if c != self.__class_column]
+
+        chunks = read_csv(filepath, header=self.__header, usecols=[self.__class_column], chunksize=chunksize)
+        y = concat([chunk.iloc[:, 0] for chunk in chunks]).values
+
+        encoder = LabelEncoder()
+        self.y = encoder.fit_transform(y)
+        self.classes = encoder.classes_
+
+    @property
+    def n_features(self):
+        return len(self.__columns)
+
+    @property
+    def n_instances(self):
+        return self.y.size
+
+    @property
+    def n_classes(self):
+        return self.classes.size
+
+    def chunks(self):
+        """Yield (first line's index, chunk's attributes as a float ndarray) for each chunk."""
+        offset = 0
+
+        for chunk in read_csv(self.filepath, header=self.__header, chunksize=self.chunksize):
+            x = chunk.values[:, self.__columns].astype(float)
+
+            yield offset, x
+            offset += x.shape[0]
+
+
+def has_header(filepath):
+    """Return 0 if the CSV file's first line is a header, None otherwise."""
+    file = open(filepath, 'r')
+    line = file.readline()
+    file.close()
+
+    try:
+        line = [float(n) for n in line.split(',')]
+        return None
+    except ValueError:
+        return 0
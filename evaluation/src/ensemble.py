@@ -0,0 +1,272 @@
+import joblib
+import numpy as np
+
+from time import time
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+from .agents import Combiner, stack_inputs
+from .cache import PredictionCache
+from .split import Distributor
+
+
+class DistributedEnsemble():
+    """A fitted feature-distributed ensemble to be saved and used to predict.
+
+    Description:
+        It keeps each learner's features, fitted preprocessor and classifier, and a
+        fitted aggregator, but not the training data. The first result of the aggregator
+        is the prediction. Saved with joblib, without compression, so arrays are
+        memory-mapped on load. With a Cascade, the cheapest learners predict first and
+        only the instances on which they disagree are predicted by the others and
+        aggregated. With caches, each learner's probabilities of repeated partition rows
+        are not predicted again; caches are not saved.
+
+    Properties:
+        features -- each learner's features indexes
+        preprocessors -- each learner's fitted preprocessor or None
+        classifiers -- each learner's fitted classifier
+        aggregator -- a fitted Aggregator
+        classes -- the classes, in the order of the probabilities' columns
+        costs -- each learner's measured seconds per instance (default None)
+        cascade -- a Cascade for early-exit predictions (default None)
+        n_features -- number of features of a row (default None, not checked)
+        n_early -- instances predicted by the cascade's first learners only
+        n_predicted -- instances predicted with the cascade
+        caches -- each learner's PredictionCache, see cache (default None)
+    """
+
+    def __init__(self, features, preprocessors, classifiers, aggregator, classes, costs=None, cascade=None,
+                 n_features=None):
+        self.features = features
+        self.preprocessors = preprocessors
+        self.classifiers = classifiers
+        self.aggregator = aggregator
+        self.classes = classes
+        self.costs = costs
+        self.cascade = cascade
+        self.n_features = n_features
+        self.n_early = 0
+        self.n_predicted = 0
+        self.caches = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['caches'] = None
+
+        return state
+
+    def cache(self, max_size=10000):
+        """Cache each learner's probabilities of up to max_size partition rows, discarding any cached row."""
+        self.caches = [PredictionCache(max_size) for _ in self.classifiers]
+
+    def invalidate(self):
+        """Discard every learner's cached rows."""
+        for cache in self.caches or []:
+            cache.clear()
+
+    def cache_metrics(self):
+        """Return the caches' size, hits, misses, hit rate and evictions, in total and per learner."""
+        learners = [cache.metrics() for cache in self.caches]
+        n = sum(m['hits'] + m['misses'] for m in learners)
+
+        total = {k: sum(m[k] for m in learners) for k in ('size', 'hits', 'misses', 'evictions')}
+        total['hit_rate'] = total['hits'] / n if n > 0 else 0.0
+
+        return dict(total, learners=[m['hit_rate'] for m in learners])
+
+    # Params' options that change how the simulator fits learners, not applied by fit
+    simulated = ('warm_start', 'binning', 'svc_approximation', 'projection', 'tuning', 'row_shards',
+                 'streaming', 'sites')
+
+    @classmethod
+    def check_params(cls, params):
+        """Raise a ValueError if the params set options that fit does not apply, as the ensemble
+        would not be the model evaluated with them.
+
+        Keyword arguments:
+            params -- a params' dict, see README
+        """
+        applied = [name for name in cls.simulated if params.get(name) is not None]
+
+        if len(applied) > 0:
+            raise ValueError('DistributedEnsemble only fits classifiers with preprocessing, '
+                             'not with: {}.'.format(', '.join(applied)))
+
+    @classmethod
+    def fit(cls, data, classifiers, aggregator, overlap=0, random_state=None, preprocessor=None, val_size=0.2,
+            cascade=None):
+        """Distribute features, fit the learners and then the aggregator on validation rows.
+        Learners are fitted once, cold, without the simulator's other options (see check_params).
+
+        Keyword arguments:
+            data -- a Data object
+            classifiers -- a list of classifiers' instances, one per learner
+            aggregator -- an Aggregator, with only one method, stateless or trained, so that
+                          each row's prediction does not depend on the rest of its batch
+            overlap -- percentage of common features between learners (default 0)
+            random_state -- seed of the distribution and of the validation rows (default None)
+            preprocessor -- a transformer's instance fitted per learner (default None)
+            val_size -- fraction of rows to fit the aggregator (default 0.2)
+            cascade -- a Cascade for early-exit predictions (default None)
+        """
+        if not (aggregator.stateless or aggregator.trained):
+            raise ValueError('Aggregator ranks rows among themselves, so predictions would depend '
+                             'on the batch: {} {}.'.format(type(aggregator).__name__, aggregator.methods))
+
+        features = Distributor(len(classifiers), overlap, random_state).split(data)
+
+        rows = np.arange(data.n_instances)
+        train_i, val_i = train_test_split(rows, test_size=val_size, stratify=data.y, random_state=random_state)
+
+        x = data.x.astype(float)
+        y = data.y
+
+        preprocessors = []
+        fitted = []
+
+        for j in range(len(features)):
+            x_train = x[np.ix_(train_i, features[j])]
+
+            if preprocessor is None:
+                preprocessors.append(None)
+            else:
+                preprocessors.append(clone(preprocessor).fit(x_train))
+                x_train = preprocessors[j].transform(x_train)
+
+            fitted.append(clone(classifiers[j]).fit(x_train, y[train_i]))
+
+        ensemble = cls(features, preprocessors, fitted, aggregator, data.classes, cascade=cascade,
+                       n_features=x.shape[1])
+
+        # Measure each learner's cost on the validation rows
+        y_proba = []
+        costs = []
+
+        for j in range(len(features)):
+            start = time()
+            y_proba.append(ensemble.__learner_proba(x[val_i, :], j))
+            costs.append((time() - start) / len(val_i))
+
+        ensemble.costs = costs
+        y_pred = [proba.argmax(axis=1) for proba in y_proba]
+
+        aggregator.aggr(y_true=y[val_i], y_pred=y_pred, y_proba=y_proba, x=y_proba, y=y[val_i],
+                        testset=y_proba, learners=[None] * len(features), test_i=val_i, scoring={})
+
+        return ensemble
+
+    def learners_proba(self, X, executor=None):
+        """Return each learner's probabilities over all classes.
+
+        Keyword arguments:
+            X -- a batch with all features
+            executor -- a concurrent.futures executor to run learners in parallel (default None)
+        """
+        learners = range(len(self.classifiers))
+
+        if executor is None:
+            return [self.__learner_proba(X, j) for j in learners]
+
+        return list(executor.map(lambda j: self.__learner_proba(X, j), learners))
+
+    def __learner_proba(self, X, j):
+        x = X[:, self.features[j]]
+
+        if self.caches is not None:
+            return self.caches[j].predict_proba(x, lambda rows: self.__partition_proba(rows, j))
+
+        return self.__partition_proba(x, j)
+
+    def __partition_proba(self, x, j):
+        if self.preprocessors[j] is not None:
+            x = self.preprocessors[j].transform(x)
+
+        proba = np.zeros((x.shape[0], len(self.classes)))
+        proba[:, self.classifiers[j].classes_] = self.classifiers[j].predict_proba(x)
+
+        return proba
+
+    def predict(self, X, executor=None):
+        """Predict the classes of a batch.
+
+        Keyword arguments:
+            X -- a batch with all features
+            executor -- a concurrent.futures executor to run learners in parallel (default None)
+        """
+        return self.classes[self.predict_proba(X, executor).argmax(axis=1)]
+
+    def predict_proba(self, X, executor=None):
+        """Predict the probabilities of a batch.
+
+        A Combiner's are its classifier's probabilities. Other aggregators
+        only predict classes, so their probabilities are one-hot, as well as
+        the probabilities of instances that exit the cascade early.
+
+        Keyword arguments:
+            X -- a batch with all features
+            executor -- a concurrent.futures executor to run learners in parallel (default None)
+        """
+        if self.cascade is None:
+            return self.__aggregate_proba(self.learners_proba(X, executor))
+
+        first = self.cascade.first(self.costs)
+        first_proba = {j: self.__learner_proba(X, j) for j in first}
+
+        early, majority = self.cascade.exit([proba.argmax(axis=1) for proba in first_proba.values()])
+        late = np.flatnonzero(~early)
+
+        proba = np.eye(len(self.classes))[majority]
+
+        if late.size > 0:
+            others = [j for j in range(len(self.classifiers)) if j not in first_proba]
+            x_late = X[late, :]
+
+            if executor is None:
+                others_proba = [self.__learner_proba(x_late, j) for j in others]
+            else:
+                others_proba = list(executor.map(lambda j: self.__learner_proba(x_late, j), others))
+
+            late_proba = dict(zip(others, others_proba))
+            late_proba.update({j: p[late, :] for j, p in first_proba.items()})
+
+            proba[late, :] = self.__aggregate_proba([late_proba[j] for j in range(len(self.classifiers))])
+
+        self.n_early += int(early.sum())
+        self.n_predicted += X.shape[0]
+
+        return proba
+
+    def __aggregate_proba(self, y_proba):
+        if isinstance(self.aggregator, Combiner):
+            combiner = self.aggregator.methods[0]
+
+            proba = np.zeros((y_proba[0].shape[0], len(self.classes)))
+            proba[:, combiner.classes_] = combiner.predict_proba(stack_inputs(y_proba, self.aggregator.input_mode))
+
+            return proba
+
+        return np.eye(len(self.classes))[self.__aggregate(y_proba)]
+
+    def save(self, filepath):
+        """Save the ensemble to a file."""
+        joblib.dump(self, filepath)
+
+    @staticmethod
+    def load(filepath, mmap_mode='c'):
+        """Load an ensemble from a file.
+
+        Keyword arguments:
+            filepath -- file's absolute/relative path
+            mmap_mode -- joblib's memory-map mode, None to read arrays in memory (default 'c',
+                         copy-on-write, as some classifiers need writable arrays)
+        """
+        return joblib.load(filepath, mmap_mode=mmap_mode)
+
+    def __aggregate(self, y_proba):
+        n = len(y_proba)
+        y_pred = [proba.argmax(axis=1) for proba in y_proba]
+
+        predictions, _ = self.aggregator.aggr(y_true=None, y_pred=y_pred, y_proba=y_proba, testset=y_proba,
+                                              learners=[None] * n, scoring={}, refit=False, report=False)
+
+        return np.asarray(next(iter(predictions.values())), dtype=int)
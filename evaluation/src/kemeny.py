@@ -0,0 +1,100 @@
+import numpy as np
+
+from itertools import permutations
+
+
+def pairwise_preferences(y_proba):
+    """Count, for each instance, how many learners rank class a above class b.
+
+    Keyword arguments:
+        y_proba -- learners' probabilities, a list of (n_instances, n_classes) arrays
+
+    Return: a (n_instances, n_classes, n_classes) array where ties count as half a vote.
+    """
+    n_instances, n_classes = y_proba[0].shape
+    preferences = np.zeros((n_instances, n_classes, n_classes))
+
+    for proba in y_proba:
+        a = proba[:, :, None]
+        b = proba[:, None, :]
+
+        preferences += (a > b) + 0.5 * (a == b)
+
+    # A class is not compared to itself
+    diagonal = np.arange(n_classes)
+    preferences[:, diagonal, diagonal] = 0
+
+    return preferences
+
+
+def exact(preferences):
+    """Return the Kemeny rankings by scoring every permutation of the classes at once.
+
+    Keyword arguments:
+        preferences -- pairwise preferences from pairwise_preferences()
+    """
+    n_instances, n_classes, _ = preferences.shape
+    rankings = np.array(list(permutations(range(n_classes))))
+
+    # before[p, a, b] = 1 if class a comes before class b in ranking p
+    position = np.argsort(rankings, axis=1)
+    before = position[:, :, None] < position[:, None, :]
+    before = before.reshape(len(rankings), -1).astype(np.float64)
+
+    scores = preferences.reshape(n_instances, -1) @ before.T
+
+    return rankings[scores.argmax(axis=1)]
+
+
+def local_search(preferences, max_iter=None):
+    """Return approximate Kemeny rankings by swapping adjacent classes from a Copeland start.
+
+    Swaps are applied to all instances at once while they increase the agreement,
+    so the result is a local optimum for adjacent transpositions.
+
+    Keyword arguments:
+        preferences -- pairwise preferences from pairwise_preferences()
+        max_iter -- maximum number of passes (default n_classes ** 2)
+    """
+    n_instances, n_classes, _ = preferences.shape
+    max_iter = n_classes ** 2 if max_iter is None else max_iter
+
+    rows = np.arange(n_instances)
+    wins = (preferences > preferences.transpose(0, 2, 1)).sum(axis=2)
+    rankings = np.argsort(-wins, axis=1, kind='stable')
+
+    for _ in range(max_iter):
+        swapped = False
+
+        for k in range(n_classes - 1):
+            a = rankings[:, k]
+            b = rankings[:, k + 1]
+
+            swap = preferences[rows, b, a] > preferences[rows, a, b]
+
+            if swap.any():
+                rankings[swap, k], rankings[swap, k + 1] = b[swap], a[swap]
+                swapped = True
+
+        if not swapped:
+            break
+
+    return rankings
+
+
+def kemeny(y_proba, exact_threshold=6):
+    """Aggregate learners' class rankings into Kemeny-Young consensus rankings.
+
+    Keyword arguments:
+        y_proba -- learners' probabilities, a list of (n_instances, n_classes) arrays
+        exact_threshold -- maximum number of classes for the exact solver (default 6)
+
+    Return: a (n_instances, n_classes) array of classes, the best first.
+    """
+    preferences = pairwise_preferences(y_proba)
+    n_classes = preferences.shape[1]
+
+    if n_classes <= exact_threshold:
+        return exact(preferences)
+
+    return local_search(preferences)
@@ -0,0 +1,124 @@
+import numpy as np
+
+from sklearn.base import BaseEstimator, ClassifierMixin
+
+
+class BatchedLinearClassifier(BaseEstimator, ClassifierMixin):
+    """Multinomial logistic regression that can be fitted on several partitions at once.
+
+    Description:
+        fit_batch stacks the partitions of the same training rows in one zero-padded
+        tensor and fits every partition's model with the same vectorized computation:
+        a ridge least-squares solution followed by accelerated gradient steps on the
+        L2-regularized cross-entropy. Each instance keeps its own partition's model,
+        so predict_proba works per partition as any other classifier.
+
+    Properties:
+        alpha -- L2 regularization strength (default 1.0)
+        max_iter -- number of gradient descent steps (default 30)
+    """
+
+    def __init__(self, alpha=1.0, max_iter=30):
+        self.alpha = alpha
+        self.max_iter = max_iter
+
+    def fit(self, X, y):
+        """Fit the model on a single partition.
+
+        Keyword arguments:
+            X -- training set
+            y -- target set
+        """
+        self.fit_batch([self], [X], y)
+        return self
+
+    @classmethod
+    def fit_batch(cls, classifiers, Xs, y):
+        """Fit one model per partition in a single vectorized computation.
+
+        All partitions use the first classifier's alpha and max_iter.
+
+        Keyword arguments:
+            classifiers -- a list of BatchedLinearClassifier, one per partition
+            Xs -- a list of partitions' training sets (same rows)
+            y -- target set
+        """
+        alpha = classifiers[0].alpha
+        max_iter = classifiers[0].max_iter
+
+        classes, y = np.unique(y, return_inverse=True)
+        widths = [X.shape[1] for X in Xs]
+
+        n_partitions = len(Xs)
+        n_instances = len(y)
+        n_classes = classes.size
+        n_columns = max(widths) + 1  # + intercept
+
+        # Standardized, zero-padded partitions with an intercept column
+        Z = np.zeros((n_partitions, n_instances, n_columns))
+        Z[:, :, -1] = 1
+        means, scales = [], []
+
+        for p in range(n_partitions):
+            X = np.asarray(Xs[p], dtype=np.float64)
+            mean = X.mean(axis=0)
+            scale = X.std(axis=0)
+            scale[scale == 0] = 1
+
+            Z[p, :, :widths[p]] = (X - mean) / scale
+            means.append(mean)
+            scales.append(scale)
+
+        # Classes are the middle axis so softmax reduces over contiguous rows
+        Y = np.zeros((n_classes, n_instances))
+        Y[y, np.arange(n_instances)] = 1
+
+        # Don't penalize the intercept
+        penalty = np.full(n_columns, alpha)
+        penalty[-1] = 0
+
+        # Ridge solution as starting point
+        Zt = Z.transpose(0, 2, 1)
+        gram = Zt @ Z
+        W = np.linalg.solve(gram + np.diag(penalty + 1e-8), Zt @ Y.T).transpose(0, 2, 1)
+
+        # Step size = 1 / Lipschitz constant of the gradient
+        lipschitz = np.linalg.eigvalsh(gram)[:, -1] / (2 * n_instances) + alpha / n_instances
+        step = (1.0 / lipschitz)[:, None, None]
+
+        # Nesterov's accelerated gradient descent
+        V = W
+
+        for k in range(max_iter):
+            proba = cls.__softmax(V @ Zt, axis=1)
+            gradient = (proba - Y) @ Z / n_instances
+            gradient += V * penalty / n_instances
+
+            W_next = V - step * gradient
+            V = W_next + (k / (k + 3)) * (W_next - W)
+            W = W_next
+
+        for p in range(n_partitions):
+            classifier = classifiers[p]
+            classifier.classes_ = classes
+            classifier.coef_ = W[p, :, :widths[p]]
+            classifier.intercept_ = W[p, :, -1]
+            classifier.mean_ = means[p]
+            classifier.scale_ = scales[p]
+
+        return classifiers
+
+    def decision_function(self, X):
+        X = (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+        return X @ self.coef_.T + self.intercept_
+
+    def predict_proba(self, X):
+        return self.__softmax(self.decision_function(X), axis=1)
+
+    def predict(self, X):
+        return self.classes_[self.decision_function(X).argmax(axis=1)]
+
+    @staticmethod
+    def __softmax(scores, axis):
+        exp = np.exp(scores - scores.max(axis=axis, keepdims=True))
+        return exp / exp.sum(axis=axis, keepdims=True)
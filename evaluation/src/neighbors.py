@@ -0,0 +1,196 @@
+import numpy as np
+
+from sklearn.base import BaseEstimator, ClassifierMixin
+
+
+class LSHKNeighborsClassifier(BaseEstimator, ClassifierMixin):
+    """Approximate k-nearest neighbors classifier using random-projection LSH.
+
+    Description:
+        Each of the n_tables hash tables maps an instance to the signs of n_bits
+        random projections. A query's candidates are the training instances that
+        share its bucket in any table and its neighbors are the nearest candidates.
+        More tables increase recall, more bits reduce the number of candidates (speed).
+        When there are fewer than n_neighbors candidates, all instances are searched.
+
+    Properties:
+        n_neighbors -- number of neighbors (default 5)
+        weights -- {'uniform', 'distance'} (default 'uniform')
+        n_tables -- number of hash tables (default 8)
+        n_bits -- number of projections per table, at most 62 (default 12)
+        random_state -- seed of the projections (default None)
+        block_size -- maximum candidates' values (candidates x features) gathered at once
+                      when querying (default 2 ** 22)
+    """
+
+    def __init__(self, n_neighbors=5, weights='uniform', n_tables=8, n_bits=12, random_state=None,
+                 block_size=2 ** 22):
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.random_state = random_state
+        self.block_size = block_size
+
+    def fit(self, X, y):
+        """Hash the training set.
+
+        Keyword arguments:
+            X -- training set
+            y -- target set
+        """
+        X = np.asarray(X, dtype=np.float64)
+        rs = np.random.RandomState(self.random_state)
+
+        self.classes_, self._y = np.unique(y, return_inverse=True)
+        self._X = X
+        self._mean = X.mean(axis=0)
+        self._planes = rs.normal(size=(self.n_tables, X.shape[1], self.n_bits))
+        self._powers = 2 ** np.arange(self.n_bits, dtype=np.int64)
+
+        codes = self.__hash(X)
+
+        self._order = np.argsort(codes, axis=1, kind='stable')
+        self._codes = np.take_along_axis(codes, self._order, axis=1)
+
+        return self
+
+    def kneighbors(self, X):
+        """Return (distances, indexes) of each instance's approximate nearest neighbors.
+
+        Query rows are processed in blocks, with the candidates of all rows of a block
+        gathered in one array, so no Python loop runs per row.
+
+        Keyword arguments:
+            X -- query instances
+        """
+        X = np.asarray(X, dtype=np.float64)
+        k = min(self.n_neighbors, self._X.shape[0])
+        n_queries = X.shape[0]
+
+        codes = self.__hash(X)
+
+        left = np.empty((n_queries, self.n_tables), dtype=np.int64)
+        right = np.empty((n_queries, self.n_tables), dtype=np.int64)
+
+        for t in range(self.n_tables):
+            left[:, t] = np.searchsorted(self._codes[t], codes[t], side='left')
+            right[:, t] = np.searchsorted(self._codes[t], codes[t], side='right')
+
+        distances = np.empty((n_queries, k))
+        indexes = np.empty((n_queries, k), dtype=np.int64)
+
+        # Blocks of rows whose candidates' values fit in block_size
+        totals = np.cumsum((right - left).sum(axis=1)) * self._X.shape[1]
+        start = 0
+
+        while start < n_queries:
+            end = max(start + 1, int(np.searchsorted(totals, totals[start] + self.block_size, side='right')))
+            end = min(end, n_queries)
+
+            block = slice(start, end)
+            distances[block], indexes[block] = self.__block(X[block], left[block], right[block], k)
+
+            start = end
+
+        return distances, indexes
+
+    def __block(self, X, left, right, k):
+        """Return (distances, indexes) of a block of query rows, given their buckets' bounds."""
+        n_rows = X.shape[0]
+        n_train = self._X.shape[0]
+
+        # Candidates of each (row, table)
+        counts = (right - left).ravel()
+        segment = np.repeat(np.arange(counts.size), counts)
+        position = np.arange(segment.size) - (np.cumsum(counts) - counts)[segment]
+
+        candidates = self._order[segment % self.n_tables, left.ravel()[segment] + position]
+
+        # Candidates found in many tables count once
+        pairs = np.sort(segment // self.n_tables * n_train + candidates)
+        pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+        row, candidates = pairs // n_train, pairs % n_train
+
+        diff = self._X[candidates] - X[row]
+        dist = np.einsum('ij,ij->i', diff, diff)
+
+        # Candidates' squared distances by row, padded with inf
+        n_candidates = np.bincount(row, minlength=n_rows)
+        column = np.arange(row.size) - (np.cumsum(n_candidates) - n_candidates)[row]
+        width = max(int(n_candidates.max()), k)
+
+        padded = np.full((n_rows, width), np.inf)
+        padded[row, column] = dist
+
+        padded_candidates = np.zeros((n_rows, width), dtype=np.int64)
+        padded_candidates[row, column] = candidates
+
+        distances = np.empty((n_rows, k))
+        indexes = np.empty((n_rows, k), dtype=np.int64)
+
+        # Too few candidates, all instances are searched
+        few = n_candidates < k
+
+        if few.any():
+            sq = (X[few] ** 2).sum(axis=1)[:, np.newaxis] + (self._X ** 2).sum(axis=1) - 2 * X[few] @ self._X.T
+            distances[few], indexes[few] = self.__nearest(np.maximum(sq, 0), np.arange(n_train), k)
+
+        if not few.all():
+            distances[~few], indexes[~few] = self.__nearest(padded[~few], padded_candidates[~few], k)
+
+        return distances, indexes
+
+    @staticmethod
+    def __nearest(dist, candidates, k):
+        """Return (distances, indexes) of the k nearest candidates from squared distances."""
+        nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        nearest = np.take_along_axis(nearest, np.argsort(np.take_along_axis(dist, nearest, axis=1), axis=1), axis=1)
+
+        if candidates.ndim == 1:
+            indexes = candidates[nearest]
+        else:
+            indexes = np.take_along_axis(candidates, nearest, axis=1)
+
+        return np.sqrt(np.take_along_axis(dist, nearest, axis=1)), indexes
+
+    def predict_proba(self, X):
+        """Return the neighbors' class probabilities, ordered as classes_.
+
+        Keyword arguments:
+            X -- query instances
+        """
+        distances, indexes = self.kneighbors(X)
+
+        if self.weights == 'uniform':
+            weights = np.ones(distances.shape)
+        elif self.weights == 'distance':
+            with np.errstate(divide='ignore'):
+                weights = 1.0 / distances
+
+            exact = np.isinf(weights)
+            rows = exact.any(axis=1)
+            weights[rows] = exact[rows]
+        else:
+            raise ValueError('{} is not a valid weights.'.format(self.weights))
+
+        n_instances = distances.shape[0]
+        proba = np.zeros((n_instances, self.classes_.size))
+
+        labels = self._y[indexes]
+        rows = np.repeat(np.arange(n_instances), labels.shape[1])
+        np.add.at(proba, (rows, labels.ravel()), weights.ravel())
+
+        return proba / proba.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        """Predict classes for X.
+
+        Keyword arguments:
+            X -- query instances
+        """
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def __hash(self, X):
+        projections = np.einsum('nf,tfb->tnb', X - self._mean, self._planes)
+        return (projections > 0).astype(np.int64) @ self._powers
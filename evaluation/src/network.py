@@ -0,0 +1,138 @@
+import heapq
+import numpy as np
+
+from .communication import Communication, payload
+
+
+class NetworkModel():
+    """Estimate distributed training and inference wall-clock with a discrete-event simulation.
+
+    Description:
+        Sites are the learners, each with an uplink to the aggregator (latency in seconds,
+        bandwidth in bytes per second). The aggregator's downlink is shared, so the sites'
+        messages are received one at a time, in order of arrival. Measured fit and predict
+        seconds are replayed:
+            training -- sites fit; Combiner and Arbiters also wait for the sites'
+                        validation probabilities
+            inference -- sites predict and send their outputs, then the aggregator
+                         aggregates them (its measured seconds, including meta-classifiers)
+        Payloads follow the Communication accounting. With n_sites, each site replays the
+        times of a random learner, drawn once per fold so that every aggregation scheme is
+        replayed on the same sites, and the aggregation seconds grow linearly with the sites.
+
+    Properties:
+        bandwidth -- sites' uplink bandwidth, a float or a list with each site's (default 1e8)
+        latency -- sites' uplink latency, a float or a list with each site's (default 1e-3)
+        aggregator_bandwidth -- aggregator's downlink bandwidth (default 1e9)
+        n_sites -- number of sites to simulate, None for one per learner (default None)
+        communication -- a Communication for the payloads (default no compression)
+        random_state -- seed to choose the replayed learners (default None)
+    """
+
+    def __init__(self, bandwidth=1e8, latency=1e-3, aggregator_bandwidth=1e9, n_sites=None,
+                 communication=None, random_state=None):
+        self.bandwidth = bandwidth
+        self.latency = latency
+        self.aggregator_bandwidth = aggregator_bandwidth
+        self.n_sites = n_sites
+        self.communication = communication or Communication()
+        self.random_state = np.random.RandomState(random_state)
+
+    def draw(self, n_learners):
+        """Return the learner replayed by each site, or None with one site per learner.
+
+        Keyword arguments:
+            n_learners -- number of learners
+        """
+        if self.n_sites is None:
+            return None
+
+        return self.random_state.randint(n_learners, size=self.n_sites)
+
+    def replay(self, aggregator, fit_seconds, predict_seconds, aggr_seconds, n_val, n_test, n_classes, sites=None):
+        """Return (training seconds, inference seconds, bytes) of an aggregation scheme in a fold.
+
+        Keyword arguments:
+            aggregator -- an Aggregator
+            fit_seconds -- each learner's measured fit seconds
+            predict_seconds -- each learner's measured predict seconds, for validation and test
+            aggr_seconds -- aggregator's measured seconds
+            n_val -- number of validation instances
+            n_test -- number of test instances
+            n_classes -- number of classes
+            sites -- the learner replayed by each site, see draw (default None, one site per learner)
+        """
+        fit_seconds = np.asarray(fit_seconds)
+        predict_seconds = np.asarray(predict_seconds)
+        n_learners = len(fit_seconds)
+
+        if sites is not None:
+            fit_seconds = fit_seconds[sites]
+            predict_seconds = predict_seconds[sites]
+            aggr_seconds = aggr_seconds * len(sites) / n_learners
+
+        n_sites = len(fit_seconds)
+        bandwidth = np.broadcast_to(np.asarray(self.bandwidth, dtype=float), (n_sites,))
+        latency = np.broadcast_to(np.asarray(self.latency, dtype=float), (n_sites,))
+
+        needs = payload(aggregator)
+        comm = self.communication
+
+        test_bytes = 0
+
+        if 'labels' in needs:
+            test_bytes += comm.label_bytes(n_test, n_classes)
+
+        if 'proba' in needs:
+            test_bytes += comm.proba_bytes(n_test, n_classes)
+
+        val_bytes = comm.proba_bytes(n_val, n_classes) if 'val_proba' in needs else 0
+
+        # Prediction seconds split by validation and test instances
+        val_seconds = predict_seconds * n_val / (n_val + n_test)
+        test_seconds = predict_seconds - val_seconds
+
+        training = fit_seconds.max()
+
+        if val_bytes > 0:
+            ready = fit_seconds + val_seconds
+            training = self.__receive(ready, val_bytes, bandwidth, latency)
+
+        inference = self.__receive(test_seconds, test_bytes, bandwidth, latency) + aggr_seconds
+
+        return training, inference, (val_bytes + test_bytes) * n_sites
+
+    def __receive(self, ready, n_bytes, bandwidth, latency):
+        """Return when the aggregator has received all sites' messages.
+
+        Keyword arguments:
+            ready -- when each site starts sending
+            n_bytes -- bytes of each site's message
+            bandwidth -- each site's uplink bandwidth
+            latency -- each site's uplink latency
+        """
+        # Arrivals at the aggregator's downlink
+        events = [(ready[i] + latency[i] + n_bytes / bandwidth[i], i) for i in range(len(ready))]
+        heapq.heapify(events)
+
+        free = 0.0
+
+        while events:
+            arrival, _ = heapq.heappop(events)
+            free = max(free, arrival) + n_bytes / self.aggregator_bandwidth
+
+        return free
+
+
+def load_network(params, communication=None):
+    """Return a NetworkModel from the params' dict or None if there is no network model.
+
+    Keyword arguments:
+        params -- a dict as {"bandwidth": float or list, "latency": float or list,
+                  "aggregator_bandwidth": float, "n_sites": int, "random_state": int}
+        communication -- a Communication for the payloads (default None)
+    """
+    if params is None:
+        return None
+
+    return NetworkModel(communication=communication, **params)
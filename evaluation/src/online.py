@@ -0,0 +1,204 @@
+import numpy as np
+
+from collections import OrderedDict
+from .selectors import SelectionRule
+
+
+class OnlineAggregator():
+    """Aggregate learners' probabilities row by row, as they arrive in any order.
+
+    Description:
+        Each learner's probabilities of a row are buffered by row id. As soon as quorum
+        learners agree on a row's class (see SelectionRule), the row is decided early,
+        otherwise when every learner has reported. When more than max_rows rows are
+        pending, the oldest ones are decided with the learners reported so far. Rows are
+        always decided by the aggregator: stateless ones over the reported learners and
+        trained ones with uniform probabilities for the missing learners, as stragglers.
+        Outputs that arrive after their row was decided are dropped. Only aggregators that
+        decide each row independently of the others, i.e., stateless or trained, can be
+        online.
+
+    Properties:
+        aggregator -- a fitted Aggregator, trained ones are not refitted
+        n_learners -- number of learners
+        n_classes -- number of classes
+        quorum -- learners that must agree to decide early (default n_learners // 2 + 1)
+        max_rows -- maximum number of pending rows (default 1000)
+        max_decided -- maximum number of decided rows' ids remembered to drop late outputs,
+                       forgotten rows are decided again (default 10 * max_rows)
+        keys -- aggregator's results' keys
+        counts -- number of rows decided, decided early, forced and of late outputs
+    """
+
+    def __init__(self, aggregator, n_learners, n_classes, quorum=None, max_rows=1000, max_decided=None):
+        if not (aggregator.stateless or aggregator.trained):
+            raise ValueError('Aggregator ranks rows among themselves and cannot be online: {} {}.'
+                             .format(type(aggregator).__name__, aggregator.methods))
+
+        self.aggregator = aggregator
+        self.n_learners = n_learners
+        self.n_classes = n_classes
+        self.quorum = quorum or n_learners // 2 + 1
+        self.max_rows = max_rows
+        self.max_decided = max_decided or 10 * max_rows
+
+        self.pending = OrderedDict()
+        self.decided = OrderedDict()
+        self.counts = {'decided': 0, 'early': 0, 'forced': 0, 'late': 0}
+        self.n_reported = 0
+
+        uniform = np.full(n_classes, 1 / n_classes)
+        self.keys = list(self.__aggregate({j: uniform for j in range(n_learners)}).keys())
+
+    def update(self, row, learner, y_proba):
+        """Add a learner's probabilities of a row and return the decisions made as [(row, {key: class}), ...].
+
+        Keyword arguments:
+            row -- row's id
+            learner -- learner's index
+            y_proba -- learner's probabilities of the row
+        """
+        if row in self.decided:
+            self.counts['late'] += 1
+            return []
+
+        outputs = self.pending.setdefault(row, dict())
+        outputs[learner] = np.asarray(y_proba)
+
+        decisions = []
+
+        if len(outputs) == self.n_learners:
+            decisions.append(self.__decide(row))
+        elif len(outputs) >= self.quorum:
+            _, countings = SelectionRule.normalize([p.argmax() for p in outputs.values()])
+
+            if max(countings) >= self.quorum:
+                self.counts['early'] += 1
+                decisions.append(self.__decide(row))
+
+        # Bounded buffer, the oldest rows are decided with what they have
+        while len(self.pending) > self.max_rows:
+            self.counts['forced'] += 1
+            decisions.append(self.__decide(next(iter(self.pending))))
+
+        return decisions
+
+    def flush(self):
+        """Decide every pending row with the learners reported so far and return the decisions."""
+        self.counts['forced'] += len(self.pending)
+        return [self.__decide(row) for row in list(self.pending)]
+
+    def metrics(self):
+        """Return counts, pending rows and mean learners reported per decision, as a dict."""
+        return dict(self.counts,
+                    pending=len(self.pending),
+                    mean_reported=self.n_reported / max(self.counts['decided'], 1))
+
+    def __decide(self, row):
+        """Remove a pending row and return (row, {key: class})."""
+        outputs = self.pending.pop(row)
+        predictions = self.__aggregate(outputs)
+
+        self.decided[row] = None
+
+        if len(self.decided) > self.max_decided:
+            self.decided.popitem(last=False)
+
+        self.counts['decided'] += 1
+        self.n_reported += len(outputs)
+
+        return row, predictions
+
+    def __aggregate(self, outputs):
+        """Return {key: class} of one row from {learner: probabilities}."""
+        if self.aggregator.trained:
+            uniform = np.full(self.n_classes, 1 / self.n_classes)
+            outputs = {j: outputs.get(j, uniform) for j in range(self.n_learners)}
+
+        y_proba = [outputs[j][np.newaxis, :] for j in sorted(outputs)]
+
+        predictions, _ = self.aggregator.aggr(y_true=None,
+                                              y_pred=[p.argmax(axis=1) for p in y_proba],
+                                              y_proba=y_proba,
+                                              testset=y_proba,
+                                              learners=sorted(outputs),
+                                              scoring={},
+                                              refit=False,
+                                              report=False)
+
+        return {k: int(v[0]) for k, v in predictions.items()}
+
+
+class OnlineReplay():
+    """Replay learners' test outputs as a stream through OnlineAggregators.
+
+    Description:
+        Each learner sends its rows in order, each one delayed by an exponential
+        jitter (in rows), so rows arrive out of order across learners.
+
+    Properties:
+        quorum -- see OnlineAggregator (default None)
+        max_rows -- see OnlineAggregator (default 1000)
+        max_decided -- see OnlineAggregator (default None)
+        jitter -- mean delay of each output, in rows (default 10.0)
+        random_state -- seed of the delays (default None)
+    """
+
+    def __init__(self, quorum=None, max_rows=1000, max_decided=None, jitter=10.0, random_state=None):
+        self.quorum = quorum
+        self.max_rows = max_rows
+        self.max_decided = max_decided
+        self.jitter = jitter
+        self.random_state = random_state
+
+    def arrivals(self, n_rows, n_learners):
+        """Return (rows, learners) of every output in arrival order.
+
+        Keyword arguments:
+            n_rows -- number of rows
+            n_learners -- number of learners
+        """
+        random = np.random.RandomState(self.random_state)
+
+        rows = np.tile(np.arange(n_rows), n_learners)
+        learners = np.repeat(np.arange(n_learners), n_rows)
+        order = np.argsort(rows + random.exponential(self.jitter, rows.size), kind='stable')
+
+        return rows[order], learners[order]
+
+    def replay(self, aggregator, probabilities):
+        """Return ({key: predictions}, metrics) of an aggregator fed in arrival order.
+
+        Keyword arguments:
+            aggregator -- a fitted Aggregator
+            probabilities -- learners' probabilities
+        """
+        n_rows, n_classes = probabilities[0].shape
+        online = OnlineAggregator(aggregator, len(probabilities), n_classes, self.quorum, self.max_rows,
+                                  self.max_decided)
+
+        predictions = {k: np.zeros(n_rows, dtype=int) for k in online.keys}
+
+        def save(decisions):
+            for row, classes in decisions:
+                for k, c in classes.items():
+                    predictions[k][row] = c
+
+        for row, learner in zip(*self.arrivals(n_rows, len(probabilities))):
+            save(online.update(row, learner, probabilities[learner][row]))
+
+        save(online.flush())
+
+        return predictions, online.metrics()
+
+
+def load_online(params):
+    """Return an OnlineReplay from the params' dict or None if there is no online mode.
+
+    Keyword arguments:
+        params -- a dict as {"quorum": int, "max_rows": int, "max_decided": int, "jitter": float, "random_state": int}
+    """
+    if params is None:
+        return None
+
+    return OnlineReplay(**params)
@@ -0,0 +1,25 @@
+from sklearn.preprocessing import StandardScaler, MinMaxScaler, QuantileTransformer
+
+
+# Available preprocessing stages
+# {<preprocessing id>: <transformer instance>}
+PREPROCESSORS = {
+    'standard': StandardScaler(),
+    'minmax': MinMaxScaler(),
+    'quantile': QuantileTransformer()
+}
+
+
+def load_preprocessor(name):
+    """Return the transformer for a preprocessing id or None if there is no preprocessing.
+
+    Keyword arguments:
+        name -- one of {'standard', 'minmax', 'quantile'} or None
+    """
+    if name is None:
+        return None
+
+    if name not in PREPROCESSORS:
+        raise ValueError('{} is not a valid preprocessing.'.format(name))
+
+    return PREPROCESSORS[name]
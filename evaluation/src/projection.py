@@ -0,0 +1,56 @@
+import math
+import numpy as np
+
+from sklearn.random_projection import SparseRandomProjection, GaussianRandomProjection
+
+
+class PartitionProjection():
+    """Random projection of a partition's features into fewer dimensions.
+
+    Properties:
+        method -- {'sparse', 'gaussian'} (default 'sparse')
+        n_components -- if float, fraction of the partition's features; if int,
+                        number of dimensions (default 0.5)
+    """
+
+    def __init__(self, method='sparse', n_components=0.5):
+        if method not in ('sparse', 'gaussian'):
+            raise ValueError('{} is not a valid projection.'.format(method))
+
+        self.method = method
+        self.n_components = n_components
+
+    def fit_transform(self, X, random_state=None):
+        """Fit a projection for X's width and return the projected X.
+
+        Keyword arguments:
+            X -- a partition
+            random_state -- seed of the projection matrix (default None)
+        """
+        X = np.asarray(X, dtype=np.float64)
+        n_features = X.shape[1]
+
+        if isinstance(self.n_components, float):
+            n_components = math.ceil(n_features * self.n_components)
+        else:
+            n_components = self.n_components
+
+        n_components = max(1, min(n_components, n_features))
+
+        if self.method == 'sparse':
+            projection = SparseRandomProjection(n_components, dense_output=True, random_state=random_state)
+        else:
+            projection = GaussianRandomProjection(n_components, random_state=random_state)
+
+        return projection.fit_transform(X)
+
+
+def load_projections(params, classifiers):
+    """Return a list with each classifier's PartitionProjection or None.
+
+    Keyword arguments:
+        params -- a dict as {<classifier id>: {"method": str, "n_components": float or int}}
+        classifiers -- a list of classifiers' ids
+    """
+    params = params or dict()
+    return [PartitionProjection(**params[c]) if c in params else None for c in classifiers]
@@ -0,0 +1,208 @@
+import numpy as np
+
+from time import time
+from sklearn.base import clone
+from .test import load_aggregator, load_imports
+
+
+class Pruner():
+    """Greedily remove learners, or replace them with cheaper classifiers, at a validation score.
+
+    Description:
+        Each learner has options: its classifier's outputs and the outputs of cheaper
+        replacement classifiers fitted on the same partition, each with its measured
+        predict seconds per instance as cost. Starting from every learner's classifier,
+        the search expands, best validation score of the aggregator first, every
+        ensemble within tolerance of the best score found so far, i.e., evaluates all
+        its changes (a cheaper option or removing a learner). Trained aggregators are
+        fitted on half of the validation instances and scored on the other half.
+        Among the evaluated ensembles, the Pareto front of cost and score is marked,
+        and the cheapest one within tolerance of the best score is selected. Ensembles
+        that are only reached through ones out of tolerance are not evaluated.
+
+    Properties:
+        aggregator -- the Aggregator to be scored, the first result is used
+        tolerance -- maximum score loss of the selected ensemble, relative to the best
+                     score (default 0.01, i.e., within 1% of the best)
+        metric -- scorer's name (default 'f1_macro')
+        replacements -- a list of cheaper classifiers' instances (default None)
+        max_evaluated -- the search stops after about max_evaluated ensembles (default 1000)
+    """
+
+    def __init__(self, aggregator, tolerance=0.01, metric='f1_macro', replacements=None, max_evaluated=1000):
+        self.aggregator = aggregator
+        self.tolerance = tolerance
+        self.metric = metric
+        self.replacements = replacements if replacements is not None else []
+        self.max_evaluated = max_evaluated
+
+    def options(self, learner, fold, y_proba_val, y_proba_test, n_classes, replace=True):
+        """Return the learner's options as [(name, y_proba_val, y_proba_test, cost), ...].
+
+        Keyword arguments:
+            learner -- a fitted Learner
+            fold -- (train, validation, test) instances' indexes
+            y_proba_val -- learner's validation probabilities
+            y_proba_test -- learner's test probabilities
+            n_classes -- number of classes
+            replace -- fit the replacements on the learner's partition (default True)
+        """
+        train_i, val_i, test_i = fold
+        n_predicted = len(val_i) + len(test_i)
+
+        options = [(type(learner.classifier).__name__, y_proba_val, y_proba_test,
+                    learner.predict_seconds / n_predicted)]
+
+        if not replace:
+            return options
+
+        for replacement in self.replacements:
+            classifier = clone(replacement).fit(learner.Xt[train_i, :], learner.y[train_i])
+
+            start = time()
+            val = classifier.predict_proba(learner.Xt[val_i, :])
+            test = classifier.predict_proba(learner.Xt[test_i, :])
+            cost = (time() - start) / n_predicted
+
+            if cost >= options[0][3]:
+                continue
+
+            val_proba = np.zeros((len(val_i), n_classes))
+            val_proba[:, classifier.classes_] = val
+
+            test_proba = np.zeros((len(test_i), n_classes))
+            test_proba[:, classifier.classes_] = test
+
+            options.append((type(classifier).__name__, val_proba, test_proba, cost))
+
+        return options
+
+    def prune(self, options, y_val, y_test, scorer):
+        """Return a row for each evaluated ensemble, as dicts.
+
+        Keyword arguments:
+            options -- each learner's options, see options
+            y_val -- validation classes
+            y_test -- test classes
+            scorer -- a scorer, from make_scorer
+        """
+        n = len(options)
+
+        # An ensemble is each learner's option index, -1 when removed
+        full = (0,) * n
+        evaluated = {full: self.__evaluate(options, full, y_val, scorer)}
+        frontier = [full]
+
+        while len(frontier) > 0 and len(evaluated) < self.max_evaluated:
+            threshold = self.__threshold(max(s for _, s in evaluated.values()))
+            frontier = [m for m in frontier if evaluated[m][1] >= threshold]
+
+            if len(frontier) == 0:
+                break
+
+            # Best score, then lowest cost
+            state = max(frontier, key=lambda m: (evaluated[m][1], -evaluated[m][0]))
+            frontier.remove(state)
+
+            for move in self.__moves(options, state):
+                if move not in evaluated:
+                    evaluated[move] = self.__evaluate(options, move, y_val, scorer)
+                    frontier.append(move)
+
+        threshold = self.__threshold(max(s for _, s in evaluated.values()))
+        selected = min((m for m in evaluated if evaluated[m][1] >= threshold),
+                       key=lambda m: evaluated[m][0])
+
+        rows = []
+
+        for m, (cost, val_score) in evaluated.items():
+            pareto = not any(c <= cost and s >= val_score and (c, s) != (cost, val_score)
+                             for c, s in evaluated.values())
+
+            test_score = np.nan
+
+            if m == selected or m == full:
+                test_score = self.__test(options, m, y_val, y_test, scorer)
+
+            rows.append({'ensemble': ','.join(options[j][o][0] if o >= 0 else '-' for j, o in enumerate(m)),
+                         'n_learners': sum(1 for o in m if o >= 0),
+                         'cost': cost,
+                         'cost_ratio': cost / evaluated[full][0],
+                         'val_' + self.metric: val_score,
+                         'test_' + self.metric: test_score,
+                         'pareto': pareto,
+                         'selected': m == selected})
+
+        return rows
+
+    def __threshold(self, best):
+        """Return the lowest score within tolerance of the best one."""
+        return best - abs(best) * self.tolerance
+
+    @staticmethod
+    def __moves(options, state):
+        """Return the ensembles one change cheaper than an ensemble."""
+        kept = sum(1 for o in state if o >= 0)
+        moves = []
+
+        for j, o in enumerate(state):
+            if o < 0:
+                continue
+
+            cheaper = [c for c in range(len(options[j])) if options[j][c][3] < options[j][o][3]]
+
+            if kept > 1:
+                cheaper.append(-1)
+
+            moves += [state[:j] + (c,) + state[j + 1:] for c in cheaper]
+
+        return moves
+
+    def __evaluate(self, options, state, y_val, scorer):
+        """Return (cost, validation score) of an ensemble."""
+        chosen = [options[j][o] for j, o in enumerate(state) if o >= 0]
+        cost = sum(option[3] for option in chosen)
+
+        val = [option[1] for option in chosen]
+
+        if self.aggregator.trained:
+            # Interleave each class' instances in two halves
+            order = np.argsort(y_val, kind='stable')
+            fit_i, score_i = order[0::2], order[1::2]
+        else:
+            fit_i = score_i = np.arange(len(y_val))
+
+        return cost, self.__score([p[fit_i] for p in val], y_val[fit_i],
+                                  [p[score_i] for p in val], y_val[score_i], scorer)
+
+    def __test(self, options, state, y_val, y_test, scorer):
+        """Return the test score of an ensemble fitted on all validation instances."""
+        chosen = [options[j][o] for j, o in enumerate(state) if o >= 0]
+        return self.__score([o[1] for o in chosen], y_val, [o[2] for o in chosen], y_test, scorer)
+
+    def __score(self, x, y, y_proba, y_true, scorer):
+        """Return the score of the aggregator's first result, fitted on x when trained."""
+        _, scores = self.aggregator.aggr(y_true=y_true, y_pred=[p.argmax(axis=1) for p in y_proba],
+                                         y_proba=y_proba, x=x, y=y, testset=y_proba,
+                                         learners=[None] * len(y_proba),
+                                         scoring={self.metric: scorer}, report=False)
+
+        return next(iter(scores.values()))[self.metric]
+
+
+def load_pruning(params, input_mode='proba'):
+    """Return a Pruner from the params' dict or None if there is no pruning.
+
+    Keyword arguments:
+        params -- a dict as {"aggregator": <spec>, "tolerance": float, "metric": str,
+                  "replacements": {<classifier id>: <full method call>}, "max_evaluated": int}
+        input_mode -- combiners' and arbiters' input (default 'proba')
+    """
+    if params is None:
+        return None
+
+    params = dict(params)
+    aggregator = load_aggregator(params.pop('aggregator'), input_mode)
+    replacements = load_imports(params.pop('replacements', {}))
+
+    return Pruner(aggregator, replacements=replacements, **params)
@@ -13,13 +13,8 @@ class SelectionRule():
         Return
             a pair of lists (list of classes, sum of each class)
         """
-        elems, counts = np.unique(pred, return_counts=True)
-        predset = list(zip(elems, counts))
-
-        cc = [(i, 0) for i in range(len(predset)) if i != predset[i][0]]
-        cc = sorted(cc + predset, key=lambda x: x[0])
-
-        return zip(*cc)
+        countings = np.bincount(np.asarray(pred, dtype=int))
+        return list(range(countings.size)), list(countings)
 
     @classmethod
     def agree(cls, pred):
@@ -51,6 +46,26 @@ class SelectionRule():
         classes, countings = cls.normalize(pred)
         return np.argmax(countings) == y
 
+    @classmethod
+    def vote(cls, y_pred):
+        """Agreement by majority and majority class of every instance at once.
+
+        Arguments
+            y_pred: a nested list of predictions (n_learners, n_instances)
+
+        Return
+            a pair of arrays (agreement, majority class)
+        """
+        pred = np.asarray(y_pred, dtype=int)
+        n_learners, n_pred = pred.shape
+
+        countings = np.zeros((n_pred, pred.max() + 1), dtype=int)
+        np.add.at(countings, (np.tile(np.arange(n_pred), n_learners), pred.ravel()), 1)
+
+        agreement = countings.max(axis=1) / n_learners > 0.5
+
+        return agreement, countings.argmax(axis=1)
+
     @classmethod
     def select(cls, y_pred, y_true):
         """Select instances according to some rule.
@@ -75,21 +90,10 @@ class SelectionRule():
         Return
             a list of predicitions
         """
-        n_learners = len(base_pred)
-        n_pred = len(arbiter_pred)
-
-        predictions = []
+        agreement, majority = cls.vote(base_pred)
+        predictions = np.where(agreement, majority, arbiter_pred)
 
-        for j in range(n_pred):
-            pred = np.array([base_pred[i][j] for i in range(n_learners)])
-
-            if cls.agree(pred):
-                _, c = cls.normalize(pred)
-                predictions.append(np.argmax(c))
-            else:
-                predictions.append(arbiter_pred[j])
-
-        return predictions
+        return list(predictions)
 
 
 class MetaDiff(SelectionRule):
@@ -105,16 +109,8 @@ class MetaDiff(SelectionRule):
         Return
             tuple (set of instances' indexes, )
         """
-        n_learners = len(y_pred)
-        n_pred = len(y_true)
-
-        indices = []
-
-        for j in range(n_pred):
-            pred = np.array([y_pred[i][j] for i in range(n_learners)])
-
-            if not cls.agree(pred):
-                indices.append(j)
+        agreement, _ = cls.vote(y_pred)
+        indices = np.flatnonzero(~agreement)
 
         return (set(indices),)
 
@@ -137,17 +133,8 @@ class MetaDiffInc(MetaDiff):
         """
         td = super().select(y_pred, y_true)
 
-        n_learners = len(y_pred)
-        n_pred = len(y_true)
-
-        indices = []
-
-        pred_i = list(range(n_pred))
-        for j in set(pred_i).difference(td[0]):
-            pred = np.array([y_pred[i][j] for i in range(n_learners)])
-
-            if not cls.correct(pred, y_true[j]):
-                indices.append(j)
+        agreement, majority = cls.vote(y_pred)
+        indices = np.flatnonzero(agreement & (majority != np.asarray(y_true)))
 
         return (td[0], set(indices))
 
@@ -188,26 +175,16 @@ class MetaDiffIncCorr(MetaDiffInc):
         Return
             a list of predicitions
         """
-        n_learners = len(base_pred)
-        n_pred = len(arbiter_pred[0])
-
-        ad_pred = arbiter_pred[0]
-        ai_pred = arbiter_pred[1]
-        ac_pred = arbiter_pred[2]
-
-        predictions = []
+        ad_pred = np.asarray(arbiter_pred[0])
+        ai_pred = np.asarray(arbiter_pred[1])
+        ac_pred = np.asarray(arbiter_pred[2])
 
-        for j in range(n_pred):
-            pred = np.array([base_pred[i][j] for i in range(n_learners)])
+        agreement, majority = cls.vote(base_pred)
 
-            if not cls.agree(pred):
-                predictions.append(ad_pred[j])
-            elif cls.correct(pred, ac_pred[j]):
-                predictions.append(ac_pred[j])
-            else:
-                predictions.append(ai_pred[j])
+        agreed_pred = np.where(majority == ac_pred, ac_pred, ai_pred)
+        predictions = np.where(agreement, agreed_pred, ad_pred)
 
-        return predictions
+        return list(predictions)
 
     def __str__(self):
         return 'mdic'
@@ -0,0 +1,258 @@
+import json
+import asyncio
+import numpy as np
+
+from time import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PredictionServer():
+    """Serve a DistributedEnsemble over HTTP, coalescing requests in micro-batches.
+
+    Description:
+        Requests are queued and a batcher takes up to max_batch_size of them, waiting
+        at most max_delay seconds after the first one. Each batch is predicted by all
+        learners in parallel threads and then aggregated. Endpoints:
+            POST /predict -- {"x": [<feature>, ...]} returns {"class": ..., "proba": [...]}
+            GET /metrics -- throughput, p50/p99 latency, batch sizes' histogram and,
+                            with a cascade, the fraction of early exits and, with caches,
+                            the caches' hit rate
+        On reload, the old ensemble's cached rows are discarded and the new one gets
+        empty caches, so no cached prediction outlives its model, and, unless n_threads
+        is set, a thread pool sized to its learners. Malformed requests are answered 400 and closed.
+
+    Properties:
+        ensemble -- a DistributedEnsemble
+        max_batch_size -- maximum number of rows per batch (default 64)
+        max_delay -- maximum seconds the first request of a batch waits (default 0.002)
+        n_threads -- threads to run learners (default one per learner)
+        cache_size -- rows cached per learner, see PredictionCache (default None, no cache)
+    """
+
+    def __init__(self, ensemble, max_batch_size=64, max_delay=0.002, n_threads=None, cache_size=None):
+        self.ensemble = ensemble
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.n_threads = n_threads
+        self.cache_size = cache_size
+
+        if cache_size is not None:
+            ensemble.cache(cache_size)
+
+        self.__executor = ThreadPoolExecutor(n_threads or len(ensemble.classifiers))
+        self.__queue = None
+
+        self.__latencies = deque(maxlen=100000)
+        self.__batch_sizes = Counter()
+        self.__n_requests = 0
+        self.__first = None
+        self.__last = None
+        self.__n_reloads = 0
+        self.__reload_errors = 0
+
+        # Executors of previous ensembles, shut down once their batch is predicted
+        self.__retired = []
+
+    def reload(self, ensemble):
+        """Serve a new ensemble, with empty caches. Batches already being predicted use the old one."""
+        self.ensemble.invalidate()
+
+        if self.cache_size is not None:
+            ensemble.cache(self.cache_size)
+        else:
+            ensemble.invalidate()
+
+        if self.n_threads is None and len(ensemble.classifiers) != len(self.ensemble.classifiers):
+            self.__retired.append(self.__executor)
+            self.__executor = ThreadPoolExecutor(len(ensemble.classifiers))
+
+        self.ensemble = ensemble
+        self.__n_reloads += 1
+
+    async def load(self, loader, *args):
+        """Call loader(*args) in a thread, not to block requests, and serve the ensemble it returns.
+        If it fails, the current ensemble is kept.
+
+        Keyword arguments:
+            loader -- a function that returns a DistributedEnsemble, e.g. DistributedEnsemble.load
+            args -- loader's arguments
+        """
+        try:
+            ensemble = await asyncio.get_running_loop().run_in_executor(None, loader, *args)
+        except Exception:
+            self.__reload_errors += 1
+            return
+
+        self.reload(ensemble)
+
+    async def predict(self, x):
+        """Queue a row and return its (class, probabilities) when its batch is predicted."""
+        x = np.asarray(x, dtype=float)
+        n_features = self.ensemble.n_features
+
+        if x.ndim != 1 or (n_features is not None and x.size != n_features):
+            raise ValueError('Expected a row with {} features, got shape {}.'.format(n_features, x.shape))
+
+        future = asyncio.get_running_loop().create_future()
+
+        if self.__first is None:
+            self.__first = time()
+
+        await self.__queue.put((x, future, time()))
+
+        return await future
+
+    def metrics(self):
+        """Return the service's metrics as a dict. Throughput is from the first request to the last answer."""
+        latencies = np.array(self.__latencies) if self.__latencies else np.zeros(1)
+        elapsed = self.__last - self.__first if self.__last is not None else np.inf
+
+        metrics = {'requests': self.__n_requests,
+                   'throughput': self.__n_requests / elapsed,
+                   'latency_p50': float(np.percentile(latencies, 50)),
+                   'latency_p99': float(np.percentile(latencies, 99)),
+                   'batch_sizes': {str(k): v for k, v in sorted(self.__batch_sizes.items())},
+                   'reloads': self.__n_reloads,
+                   'reload_errors': self.__reload_errors}
+
+        if self.ensemble.cascade is not None and self.ensemble.n_predicted > 0:
+            metrics['early_exit'] = self.ensemble.n_early / self.ensemble.n_predicted
+
+        if self.ensemble.caches is not None:
+            metrics['cache'] = self.ensemble.cache_metrics()
+
+        return metrics
+
+    async def batch(self):
+        """Predict queued rows in micro-batches, forever."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            requests = [await self.__queue.get()]
+            deadline = loop.time() + self.max_delay
+
+            while len(requests) < self.max_batch_size:
+                timeout = deadline - loop.time()
+
+                if timeout <= 0:
+                    break
+
+                try:
+                    requests.append(await asyncio.wait_for(self.__queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            ensemble, executor = self.ensemble, self.__executor
+
+            # A failure is answered to its batch's requests, the batcher goes on
+            try:
+                X = np.vstack([x for x, _, _ in requests])
+                proba = await loop.run_in_executor(None, ensemble.predict_proba, X, executor)
+                classes = np.asarray(ensemble.classes)[proba.argmax(axis=1)].tolist()
+            except Exception as error:
+                for _, future, _ in requests:
+                    if not future.done():
+                        future.set_exception(error)
+
+                continue
+            finally:
+                while len(self.__retired) > 0:
+                    self.__retired.pop().shutdown(wait=False)
+
+            now = time()
+
+            for i, (_, future, start) in enumerate(requests):
+                if not future.done():
+                    future.set_result((classes[i], proba[i].tolist()))
+
+                self.__latencies.append(now - start)
+
+            self.__n_requests += len(requests)
+            self.__last = now
+            self.__batch_sizes[len(requests)] += 1
+
+    async def handle(self, reader, writer):
+        """Answer HTTP/1.1 requests of a connection, kept alive until the client closes it."""
+        try:
+            while True:
+                request = await reader.readline()
+
+                if not request:
+                    break
+
+                # A malformed request line or header is answered and the connection closed
+                try:
+                    method, path, headers = await self.__read_head(request, reader)
+                except ValueError as error:
+                    await self.__respond(writer, '400 Bad Request', {'error': str(error)})
+                    break
+
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                if method == 'POST' and path == '/predict':
+                    try:
+                        label, proba = await self.predict(json.loads(body)['x'])
+                        status, content = '200 OK', {'class': label, 'proba': proba}
+                    except (KeyError, TypeError, ValueError) as error:
+                        status, content = '400 Bad Request', {'error': str(error)}
+                    except Exception as error:
+                        status, content = '500 Internal Server Error', {'error': str(error)}
+                elif method == 'GET' and path == '/metrics':
+                    status, content = '200 OK', self.metrics()
+                else:
+                    status, content = '404 Not Found', {'error': path}
+
+                await self.__respond(writer, status, content)
+
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def __read_head(request, reader):
+        """Return a request's (method, path, headers), raising a ValueError if it is malformed."""
+        method, path, _ = request.decode().split(' ', 2)
+        headers = {}
+
+        while True:
+            line = (await reader.readline()).decode().strip()
+
+            if not line:
+                break
+
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+        if int(headers.get('content-length', 0)) < 0:
+            raise ValueError('Negative Content-Length.')
+
+        return method, path, headers
+
+    @staticmethod
+    async def __respond(writer, status, content):
+        content = json.dumps(content).encode()
+
+        writer.write('HTTP/1.1 {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n\r\n'
+                     .format(status, len(content)).encode() + content)
+        await writer.drain()
+
+    async def serve(self, host='127.0.0.1', port=8000, path=None):
+        """Serve on host:port, or on a Unix socket if path is given, forever."""
+        self.__queue = asyncio.Queue()
+
+        if path is None:
+            server = await asyncio.start_server(self.handle, host, port)
+        else:
+            server = await asyncio.start_unix_server(self.handle, path)
+
+        batcher = asyncio.ensure_future(self.batch())
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
@@ -1,7 +1,17 @@
 from .split import P3StratifiedKFold, Distributor
-from .metrics import cv_score
+from sklearn.base import clone
+from sklearn.neural_network import MLPClassifier
+from sklearn.tree import DecisionTreeClassifier
+from copy import deepcopy
+import json
+from .metrics import cv_score, score
+import numpy as np
+from time import time
 from threading import Thread
-from .agents import Learner
+from .agents import Learner, Arbiter
+from .approximation import ApproximateSVC
+from .linear import BatchedLinearClassifier
+from sklearn.metrics import accuracy_score
 
 
 class FeatureDistributedSimulator():
@@ -11,16 +21,91 @@ class FeatureDistributedSimulator():
         This class simulates a distributed learning using classifier agents. It divides
         the data vertically, i. e., it divides the features randomly between the learners.
     """
-    def __init__(self, data, classifiers, agreggators):
+    def __init__(self, data, classifiers, agreggators, preprocessor=None, warm_start=None, binner=None,
+                 svc_approximation=None, projections=None, tuner=None, classifier_ids=None,
+                 batch_aggregation=False, communication=None, stragglers=None, sites=None,
+                 network=None, row_shards=None, stream=None, cascade=None, pruner=None,
+                 online=None):
         """Set private properties.
 
         Keyword arguments:
             classifiers -- a list of classifiers' instances
             aggregators -- a list of agreggators' inatances
+            preprocessor -- a transformer's instance fitted per fold and partition (default None)
+            warm_start -- a MLPWarmStart policy for MLP learners (default None)
+            binner -- a Binner fitted per fold whose bins are shared by tree learners (default None)
+            svc_approximation -- a SVCApproximation policy for SVC learners (default None)
+            projections -- a list with each classifier's PartitionProjection or None (default None)
+            tuner -- a SuccessiveHalving to tune learners once per seed (default None)
+            classifier_ids -- a list of classifiers' ids, required by the tuner (default None)
+            batch_aggregation -- apply stateless aggregators once per CV iteration (default False)
+            communication -- a Communication to compress probabilities and count bytes (default None)
+            stragglers -- a Stragglers to also aggregate only the learners within deadlines (default None)
+            sites -- a Sites to fit and predict each learner in its own process (default None)
+            network -- a NetworkModel to estimate each aggregation scheme's wall-clock (default None)
+            row_shards -- number of row shards per partition, each one with its own model (default None)
+            stream -- a Stream to fit learners with partial_fit on data as a StreamData (default None)
+            cascade -- a Cascade to estimate arbiters' early-exit inference (default None)
+            pruner -- a Pruner to search cheaper ensembles on validation outputs (default None)
+            online -- an OnlineReplay to also aggregate test outputs as a stream (default None)
+
+        Properties:
+            reports -- extra results as {<report name>: <list of rows as dicts>}
+            aggregator_keys -- aggregators' results' keys, in the order of the returned scores
         """
         self.__data = data
         self.__classifiers = classifiers
         self.__aggregators = agreggators
+        self.__preprocessor = preprocessor
+        self.__warm_start = warm_start
+        self.__binner = binner
+        self.__svc_approximation = svc_approximation
+        self.__projections = projections or [None] * len(classifiers)
+        self.__tuner = tuner
+        self.__classifier_ids = classifier_ids
+        self.__batch_aggregation = batch_aggregation
+        self.__communication = communication
+        self.__stragglers = stragglers
+        self.__sites = sites
+        self.__network = network
+        self.__row_shards = row_shards
+        self.__stream = stream
+        self.__cascade = cascade
+        self.__pruner = pruner
+        self.__online = online
+
+        if stream is not None:
+            in_memory = {'preprocessing': preprocessor, 'warm_start': warm_start, 'binning': binner,
+                         'projection': [p for p in projections or [] if p is not None] or None,
+                         'tuning': tuner, 'row_shards': row_shards, 'sites': sites}
+            applied = [name for name, option in in_memory.items() if option is not None]
+
+            if len(applied) > 0:
+                raise ValueError('Streaming does not keep the data in memory, as needed by: {}.'
+                                 .format(', '.join(applied)))
+
+        if sites is not None:
+            in_process = {'binning': binner,
+                          'batched linear fitting': row_shards is None and any(
+                              isinstance(c, BatchedLinearClassifier) for c in classifiers) or None}
+            applied = [name for name, option in in_process.items() if option is not None]
+
+            if len(applied) > 0:
+                raise ValueError('Sites fit each learner in its own process, which does not apply: {}.'
+                                 .format(', '.join(applied)))
+
+        if binner is not None:
+            trees =[isinstance(c, DecisionTreeClassifier) for c in classifiers]
+            projected = [trees[i] and self.__projections[i] is not None for i in range(len(classifiers))]
+
+            if any(trees) and preprocessor is not None:
+                raise ValueError('Decision tree learners are fitted on bin codes, set either binning or preprocessing.')
+
+            if any(projected):
+                raise ValueError('Decision tree learners are fitted on bin codes, set either binning or their projection.')
+
+        self.reports = dict()
+        self.aggregator_keys = []
 
     def evaluate(self, overlap, random_state=None, scoring={}, n_it=10):
         """Run the cross_validate function for each agent and returns a list with each learner's scores.
@@ -48,8 +133,17 @@ class FeatureDistributedSimulator():
         ranks = {}
         learners = []
 
+        # Results' keys by aggregator, to keep aggregators' order
+        aggr_keys = [[] for _ in self.__aggregators]
+
+        # Stateless aggregators are applied once per CV iteration in batch mode
+        batched_aggr = [self.__batch_aggregation and a.stateless for a in self.__aggregators]
+
         skf = P3StratifiedKFold(n_splits=k_fold, shuffle=True, random_state=random_state)
 
+        # Epochs of each partition's first fit, which starts cold
+        cold_epochs = {}
+
         for seed in range(n_it):
             learners = self.__distribute(overlap, seed, learners)
             n = len(learners)
@@ -57,31 +151,91 @@ class FeatureDistributedSimulator():
             sample_x = learners[0].X
             sample_y = learners[0].y
 
-            for fold in skf.split(sample_x, sample_y):
+            # Only the number of rows is needed to split
+            if self.__stream is not None:
+                sample_x = np.zeros((len(sample_y), 1))
+
+            folds = list(skf.split(sample_x, sample_y))
+            batch = []
+            measured = []
+            drawn = []
+
+            # Tune learners once per seed
+            if self.__tuner is not None:
+                self.__tune(learners, folds, seed)
+
+            # Fit and predict all folds in passes over the data
+            if self.__stream is not None:
+                # Sorted in place, so chunks' rows are found without a copy
+                for indexes in folds:
+                    for i in indexes:
+                        i.sort()
+
+                start = time()
+                streamed = self.__stream.run(self.__data, learners, folds)
+
+                self.__report('streaming', seed=seed, seconds=time() - start,
+                              chunksize=self.__stream.chunksize, epochs=self.__stream.epochs)
+
+            # Send partitions to the sites once per seed
+            if self.__sites is not None:
+                if seed == 0:
+                    self.__sites.start(n)
+
+                self.__sites.setup(learners)
+                setup_bytes = self.__sites.bytes_sent
+
+            for f, fold in enumerate(folds):
                 train_i, val_i, test_i = fold
 
                 combiner_input = list()
                 probabilities = list()
                 predictions = list()
 
-                # For each learner...
-                threads = []
-                for j in range(n):
-                    # Fit
-                    x_train = learners[j].X[train_i, :]
-                    y_train = learners[j].y[train_i]
+                outputs = None
+
+                if self.__stream is not None:
+                    outputs = streamed[f]
+                elif self.__sites is None:
+                    self.__fit(learners, seed, f, fold)
+                else:
+                    outputs, wall = self.__sites.run_fold(fold)
+                    n_bytes = self.__sites.bytes_sent + self.__sites.bytes_received
+
+                    self.__report('sites', seed=seed, fold=f, wall_seconds=wall,
+                                  setup_bytes=setup_bytes,
+                                  bytes_sent=self.__sites.bytes_sent,
+                                  bytes_received=self.__sites.bytes_received,
+                                  bytes_per_second=n_bytes / wall,
+                                  instances_per_second=(len(val_i) + len(test_i)) / wall)
+
+                # Learners' outputs computed elsewhere
+                if outputs is not None:
+                    for j in range(n):
+                        fit_seconds, predict_seconds, epochs = outputs[j][3]
 
-                    thread = Thread(target=learners[j].fit, args=(x_train, y_train), daemon=True)
-                    thread.start()
+                        learners[j].fit_seconds = fit_seconds
+                        learners[j].predict_seconds = predict_seconds
+                        learners[j].epochs = None if np.isnan(epochs) else int(epochs)
 
-                    threads.append(thread)
+                if self.__row_shards is not None and self.__stream is None:
+                    self.__report_shards(learners, seed, f, train_i)
 
                 for j in range(n):
-                    threads[j].join()
+                    if learners[j].warm_start is not None:
+                        epochs = learners[j].epochs
+                        cold = cold_epochs.setdefault((j, tuple(learners[j].features)), epochs)
+
+                        self.__report('warm_start', seed=seed, fold=f, learner=j, epochs=epochs,
+                                      cold_epochs=cold, epochs_saved=cold - epochs)
 
                 for j in range(n):
                     # Evaluate
-                    y_pred, y_proba_val, y_proba_test, metrics = learners[j].evaluate(fold, scoring)
+                    if outputs is None:
+                        y_pred, y_proba_val, y_proba_test, metrics = learners[j].evaluate(fold, scoring)
+                    else:
+                        y_pred, y_proba_val, y_proba_test, _ = outputs[j]
+                        metrics = score(sample_y[test_i], y_pred, scoring)
 
                     # Save for combiner
                     combiner_input.append(y_proba_val)
@@ -90,14 +244,50 @@ class FeatureDistributedSimulator():
                     predictions.append(y_pred)
                     probabilities.append(y_proba_test)
 
+                    # Compare approximate and exact SVC
+                    approximate = isinstance(learners[j].classifier, ApproximateSVC)
+
+                    if approximate and self.__svc_approximation.compare and f == 0:
+                        self.__compare_svc(learners[j], j, seed, fold, y_pred)
+
+                    # A learner alone sends nothing
+                    if self.__communication is not None:
+                        metrics['bytes'] = 0
+
                     # Save score
                     scores.setdefault(j, [])
                     scores[j].append(metrics)
 
+                # Cost/score front of cheaper ensembles
+                if self.__pruner is not None:
+                    self.__prune(learners, seed, f, fold, combiner_input, probabilities, scoring)
+
+                # Probabilities as received by the aggregators
+                if self.__communication is not None:
+                    combiner_input = [self.__communication.compress(p) for p in combiner_input]
+                    probabilities = [self.__communication.compress(p) for p in probabilities]
+
+                # Save for batched aggregators
+                if any(batched_aggr):
+                    batch.append((sample_y[test_i], predictions, probabilities))
+
+                # Measured times, for the network model and the cascade
+                measured.append(([learner.fit_seconds for learner in learners],
+                                 [learner.predict_seconds for learner in learners],
+                                 len(val_i), len(test_i), probabilities[0].shape[1]))
+
+                # The same sites replay every aggregation scheme of the fold
+                if self.__network is not None:
+                    drawn.append(self.__network.draw(n))
+
                 # Aggregate probabilities with different methods
                 aggr_r, aggr_s = {}, {}
 
                 for k in range(len(self.__aggregators)):
+                    if batched_aggr[k]:
+                        continue
+
+                    start = time()
                     rank, metrics = self.__aggregators[k].aggr(y_true=sample_y[test_i],
                                                                 y_pred=predictions,
                                                                 y_proba=probabilities,
@@ -107,9 +297,29 @@ class FeatureDistributedSimulator():
                                                                 learners=learners,
                                                                 test_i=test_i,
                                                                 scoring=scoring)
+                    seconds = time() - start
+
+                    if self.__network is not None:
+                        self.__replay(self.__aggregators[k], list(rank), seed, f, measured[f], drawn[f],
+                                      seconds)
+
+                    if self.__cascade is not None and isinstance(self.__aggregators[k], Arbiter):
+                        self.__cascaded(self.__aggregators[k], rank, seed, f, measured[f], predictions,
+                                        probabilities, sample_y[test_i], scoring)
+
+                    online = self.__aggregators[k].stateless or self.__aggregators[k].trained
+
+                    if self.__online is not None and online:
+                        self.__stream_outputs(self.__aggregators[k], rank, seed, f, probabilities,
+                                              sample_y[test_i], scoring)
+
+                    if self.__communication is not None:
+                        self.__count_bytes(self.__aggregators[k], metrics, n, len(val_i),
+                                           len(test_i), probabilities[0].shape[1])
 
                     aggr_r.update(rank)
                     aggr_s.update(metrics)
+                    aggr_keys[k] += [key for key in rank if key not in aggr_keys[k]]
 
                 # Save ranks
                 for k in aggr_r:
@@ -121,8 +331,332 @@ class FeatureDistributedSimulator():
                     scores.setdefault(k, [])
                     scores[k].append(aggr_s[k])
 
+                # Aggregate only the learners within each deadline
+                if self.__stragglers is not None:
+                    self.__straggle(learners, seed, f, fold, predictions, probabilities,
+                                    combiner_input, scoring)
+
+            # Aggregate the whole CV iteration at once
+            for k in range(len(self.__aggregators)):
+                if batched_aggr[k]:
+                    start = time()
+                    aggr_keys[k] += self.__aggregate_batch(self.__aggregators[k], batch,
+                                                           ranks, scores, scoring, aggr_keys[k])
+                    seconds = time() - start
+
+                    # Online replay is per fold, as for the other aggregators
+                    if self.__online is not None:
+                        for f, (y_true, _, probabilities) in enumerate(batch):
+                            rank = {key: ranks[key][f - len(batch)] for key in aggr_keys[k]}
+                            self.__stream_outputs(self.__aggregators[k], rank, seed, f, probabilities,
+                                                  y_true, scoring)
+
+                    # Each fold's share of the aggregation
+                    if self.__network is not None:
+                        for f in range(len(folds)):
+                            self.__replay(self.__aggregators[k], aggr_keys[k], seed, f,
+                                          measured[f], drawn[f], seconds / len(folds))
+
+        if self.__sites is not None:
+            self.__sites.close()
+
+        # Aggregators' reports
+        for aggregator in self.__aggregators:
+            for name, rows in getattr(aggregator, 'reports', {}).items():
+                self.reports.setdefault(name, [])
+                self.reports[name] += rows
+
+        # Learners first, then aggregators in the given order
+        self.aggregator_keys = [key for keys in aggr_keys for key in keys]
+        keys = list(range(n)) + self.aggregator_keys
+
         # Return the ranks and aggregated scores as DataFrames for each learner
-        return ranks, [cv_score(scores[k]) for k in scores]
+        return ranks, [cv_score(scores[k]) for k in keys if k in scores]
+
+    def __aggregate_batch(self, aggregator, batch, ranks, scores, scoring, known_keys):
+        """Apply a stateless aggregator to all folds' test instances and score each fold.
+
+        Keyword arguments:
+            aggregator -- a stateless Aggregator
+            batch -- a list of (y_true, predictions, probabilities) for each fold
+            ranks -- ranks to be updated
+            scores -- scores to be updated
+            scoring -- a dict of scorers
+            known_keys -- aggregator's results' keys already known
+
+        Return: the new results' keys.
+        """
+        n_learners = len(batch[0][1])
+
+        y_true = [b[0] for b in batch]
+        y_pred = [np.concatenate([b[1][j] for b in batch]) for j in range(n_learners)]
+        y_proba = [np.concatenate([b[2][j] for b in batch]) for j in range(n_learners)]
+
+        # Where each fold ends in the concatenation
+        ends = np.cumsum([len(y) for y in y_true])[:-1]
+
+        aggr_r, _ = aggregator.aggr(y_true=np.concatenate(y_true),
+                                    y_pred=y_pred,
+                                    y_proba=y_proba,
+                                    scoring={})
+
+        for k, predictions in aggr_r.items():
+            for f, fold_pred in enumerate(np.split(np.asarray(predictions), ends)):
+                ranks.setdefault(k, [])
+                ranks[k].append(fold_pred)
+
+                metrics = {k: score(y_true[f], fold_pred, scoring)}
+
+                if self.__communication is not None:
+                    self.__count_bytes(aggregator, metrics, n_learners, 0,
+                                       len(y_true[f]), y_proba[0].shape[1])
+
+                scores.setdefault(k, [])
+                scores[k].append(metrics[k])
+
+        return [k for k in aggr_r if k not in known_keys]
+
+    def __cascaded(self, arbiter, rank, seed, fold, measured, predictions, probabilities, y_true, scoring):
+        """Score arbiters' results with early exit and estimate the inference cost saved.
+
+        Keyword arguments:
+            arbiter -- an Arbiter fitted on the fold
+            rank -- arbiter's predictions by result's key
+            seed -- CV iteration
+            fold -- fold's number
+            measured -- (fit seconds, predict seconds, n_val, n_test, n_classes) of the fold
+            predictions -- learners' predictions
+            probabilities -- learners' test probabilities
+            y_true -- true classes
+            scoring -- a dict of scorers
+        """
+        _, predict_seconds, n_val, n_test, _ = measured
+
+        # Arbiter's inference only, without fitting its methods
+        start = time()
+        arbiter.aggr(y_true=y_true, y_pred=predictions, testset=probabilities, scoring={}, refit=False)
+        arbiter_seconds = time() - start
+
+        # Costs per instance
+        costs = np.asarray(predict_seconds) / (n_val + n_test)
+        arbiter_cost = arbiter_seconds / n_test
+
+        first = self.__cascade.first(costs)
+        early, majority = self.__cascade.exit([predictions[j] for j in first])
+
+        cost_ratio = self.__cascade.cost_ratio(costs, arbiter_cost, early.mean())
+
+        for key, y_pred in rank.items():
+            cascaded = np.where(early, majority, y_pred)
+
+            self.__report('cascade', seed=seed, fold=fold, aggregator=key,
+                          n_first=len(first), early_exit=early.mean(), cost_ratio=cost_ratio,
+                          **{'full_' + k: v for k, v in score(y_true, y_pred, scoring).items()},
+                          **score(y_true, cascaded, scoring))
+
+    def __replay(self, aggregator, keys, seed, fold, measured, sites, seconds):
+        """Estimate an aggregation scheme's wall-clock in a fold with the network model.
+
+        Keyword arguments:
+            aggregator -- an Aggregator
+            keys -- aggregator's results' keys
+            seed -- CV iteration
+            fold -- fold's number
+            measured -- (fit seconds, predict seconds, n_val, n_test, n_classes) of the fold
+            sites -- the fold's learners replayed by each site, see NetworkModel.draw
+            seconds -- aggregator's measured seconds
+        """
+        fit_seconds, predict_seconds, n_val, n_test, n_classes = measured
+
+        training, inference, n_bytes = self.__network.replay(aggregator, fit_seconds, predict_seconds,
+                                                             seconds, n_val, n_test, n_classes, sites)
+
+        for key in keys:
+            self.__report('network', seed=seed, fold=fold, aggregator=key,
+                          n_sites=self.__network.n_sites or len(fit_seconds),
+                          training_seconds=training, inference_seconds=inference, bytes=n_bytes)
+
+    def __fit(self, learners, seed, fold, indexes):
+        """Fit all learners on a fold, in threads, except the batched linear ones."""
+        train_i = indexes[0]
+        n = len(learners)
+
+        # Bin features once per fold, shared by tree learners
+        if self.__binner is not None:
+            self.__bin(learners, seed, fold, train_i)
+
+        batched = [isinstance(l.classifier, BatchedLinearClassifier) and l.n_shards is None for l in learners]
+
+        # For each learner...
+        threads = []
+        for j in range(n):
+            if batched[j]:
+                continue
+
+            # Preprocess once per (fold, partition) and fit
+            thread = Thread(target=learners[j].fit_fold, args=(indexes,), daemon=True)
+            thread.start()
+
+            threads.append(thread)
+
+        # Fit batched linear learners in one computation
+        if any(batched):
+            self.__fit_batched([learners[j] for j in range(n) if batched[j]], train_i)
+
+        for thread in threads:
+            thread.join()
+
+    def __straggle(self, learners, seed, fold, indexes, predictions, probabilities, combiner_input, scoring):
+        """Aggregate the outputs of the learners that reported within each deadline.
+
+        Trained aggregators reuse the fold's fit and receive uniform probabilities
+        for the missing learners. The others receive only the reported learners.
+        """
+        _, val_i, test_i = indexes
+        y = learners[0].y
+
+        measured = [learner.fit_seconds + learner.predict_seconds for learner in learners]
+        latencies = self.__stragglers.latencies(measured)
+
+        missing = np.full(probabilities[0].shape, 1 / probabilities[0].shape[1])
+
+        for deadline, reported in self.__stragglers.reported(latencies):
+            if len(reported) == 0:
+                continue
+
+            subset = dict(y_true=y[test_i],
+                          y_pred=[predictions[j] for j in reported],
+                          y_proba=[probabilities[j] for j in reported],
+                          x=[combiner_input[j] for j in reported],
+                          y=y[val_i],
+                          testset=[probabilities[j] for j in reported],
+                          learners=[learners[j] for j in reported],
+                          test_i=test_i,
+                          scoring=scoring,
+                          report=False)
+
+            imputed = dict(subset,
+                           testset=[probabilities[j] if j in reported else missing for j in range(len(learners))],
+                           refit=False)
+
+            for aggregator in self.__aggregators:
+                _, metrics = aggregator.aggr(**(imputed if aggregator.trained else subset))
+
+                for key, values in metrics.items():
+                    self.__report('stragglers', seed=seed, fold=fold, deadline=deadline,
+                                  aggregator=key, n_reported=len(reported), **values)
+
+    def __stream_outputs(self, aggregator, rank, seed, fold, probabilities, y_true, scoring):
+        """Save the scores of a fitted aggregator fed in arrival order in the online report."""
+        predictions, metrics = self.__online.replay(aggregator, probabilities)
+
+        for key, y_pred in predictions.items():
+            self.__report('online', seed=seed, fold=fold, aggregator=key, **metrics,
+                          agreement=np.mean(y_pred == np.asarray(rank[key])),
+                          **score(y_true, y_pred, scoring))
+
+    def __prune(self, learners, seed, fold, indexes, combiner_input, probabilities, scoring):
+        """Save the pruner's evaluated ensembles in the pruning report.
+
+        Replacements are fitted only when learners are fitted in this process.
+        """
+        _, val_i, test_i = indexes
+        y = learners[0].y
+        n_classes = probabilities[0].shape[1]
+
+        if self.__pruner.metric not in scoring:
+            raise ValueError('Pruning metric is not in metrics: {}.'.format(self.__pruner.metric))
+
+        replace = self.__sites is None and self.__stream is None
+        options = [self.__pruner.options(learners[j], indexes, combiner_input[j], probabilities[j],
+                                         n_classes, replace) for j in range(len(learners))]
+
+        for row in self.__pruner.prune(options, y[val_i], y[test_i], scoring[self.__pruner.metric]):
+            self.__report('pruning', seed=seed, fold=fold, **row)
+
+    def __count_bytes(self, aggregator, metrics, n_learners, n_val, n_test, n_classes):
+        """Add the bytes sent by all learners to each of the aggregator's metrics."""
+        n_bytes = self.__communication.bytes(aggregator, n_val, n_test, n_classes)
+
+        for key in metrics:
+            metrics[key]['bytes'] = n_bytes * n_learners
+
+    def __tune(self, learners, folds, seed):
+        for j in range(len(learners)):
+            classifier_id = self.__classifier_ids[j]
+
+            if classifier_id not in self.__tuner.spaces:
+                continue
+
+            # Tree learners are tuned on each fold's bins, as they are fitted
+            binner = self.__binner if isinstance(learners[j].classifier, DecisionTreeClassifier) else None
+
+            params, cached = self.__tuner.tune(learners[j], classifier_id, folds, binner)
+            learners[j].classifier = clone(learners[j].classifier).set_params(**params)
+
+            self.__report('tuning', seed=seed, learner=j, params=json.dumps(params), cached=cached)
+
+    def __fit_batched(self, learners, train_i):
+        """Fit batched linear learners at once. Each one's fit seconds are its preprocessing
+        plus an equal share of the batched fit."""
+        classifiers = [learner.classifier for learner in learners]
+        y_train = learners[0].y[train_i]
+        x_train = []
+
+        for learner in learners:
+            start = time()
+            x_train.append(learner.prepare(train_i)[train_i, :])
+            learner.fit_seconds = time() - start
+
+        start = time()
+        BatchedLinearClassifier.fit_batch(classifiers, x_train, y_train)
+        share = (time() - start) / len(learners)
+
+        for learner in learners:
+            learner.fit_seconds += share
+
+    def __bin(self, learners, seed, fold, train_i):
+        x = self.__data.x
+
+        start = time()
+        binned = self.__binner.fit(x[train_i, :]).transform(x)
+        seconds = time() - start
+
+        for learner in learners:
+            if isinstance(learner.classifier, DecisionTreeClassifier):
+                learner.binned = binned
+
+        self.__report('binning', seed=seed, fold=fold, seconds=seconds,
+                      mean_bins=np.mean([len(edges) + 1 for edges in self.__binner.bin_edges]))
+
+    def __report_shards(self, learners, seed, fold, train_i):
+        for j, learner in enumerate(learners):
+            n_features = learner.Xt.shape[1]
+            shard_rows = -(-len(train_i) // self.__row_shards)
+
+            self.__report('row_shards', seed=seed, fold=fold, learner=j,
+                          n_shards=self.__row_shards, shard_rows=shard_rows,
+                          partition_bytes=len(train_i) * n_features * 8,
+                          shard_bytes=shard_rows * n_features * 8)
+
+    def __compare_svc(self, learner, j, seed, fold, y_pred):
+        train_i, _, test_i = fold
+
+        exact = clone(self.__classifiers[j])
+        exact.fit(learner.Xt[train_i, :], learner.y[train_i])
+
+        y_test = learner.y[test_i]
+        exact_accuracy = accuracy_score(y_test, exact.predict(learner.Xt[test_i, :]))
+        approximate_accuracy = accuracy_score(y_test, y_pred)
+
+        self.__report('svc_approximation', seed=seed, learner=j,
+                      exact_accuracy=exact_accuracy,
+                      approximate_accuracy=approximate_accuracy,
+                      difference=exact_accuracy - approximate_accuracy)
+
+    def __report(self, name, **row):
+        self.reports.setdefault(name, [])
+        self.reports[name].append(row)
 
     def __distribute(self, overlap, random_state, learners=[]):
         n_learners = len(self.__classifiers)
@@ -138,8 +672,35 @@ class FeatureDistributedSimulator():
         for i in range(n_indexes):
             features = indexes[i]
 
-            learners[i].X = self.__data.x[:, features]
+            learners[i].features = features
+            learners[i].X = None if self.__stream is not None else self.__data.x[:, features]
+
+            # Project once per seed
+            if self.__projections[i] is not None and self.__stream is None:
+                learners[i].X = self.__projections[i].fit_transform(learners[i].X, random_state)
+
+                self.__report('projection', seed=random_state, learner=i,
+                              n_features=len(features),
+                              n_components=learners[i].X.shape[1],
+                              compression=learners[i].X.shape[1] / len(features))
+
+            learners[i].Xt = learners[i].X
             learners[i].y = self.__data.y
             learners[i].classifier = self.__classifiers[i]
 
+            if self.__preprocessor is not None:
+                learners[i].preprocessor = clone(self.__preprocessor)
+
+            learners[i].approximation = self.__svc_approximation
+            learners[i].n_shards = self.__row_shards
+
+            is_mlp = isinstance(learners[i].classifier, MLPClassifier)
+
+            # Neither shards nor streamed learners are warm started
+            if self.__row_shards is not None or self.__stream is not None:
+                is_mlp = False
+
+            if self.__warm_start is not None and is_mlp and learners[i].warm_start is None:
+                learners[i].warm_start = deepcopy(self.__warm_start)
+
         return learners
@@ -0,0 +1,341 @@
+import os
+import json
+import socket
+import struct
+import inspect
+import tempfile
+import importlib
+import numpy as np
+import multiprocessing as mp
+
+from time import time
+from .agents import Learner
+
+
+# Message: type (1 byte), payload's length (4 bytes), payload
+HEADER = struct.Struct('!BI')
+
+# Array: dtype's char (1 byte), number of dimensions (1 byte), shape (4 bytes each), data
+ARRAY = struct.Struct('!cB')
+
+SETUP, FOLD, OUTPUTS, CLOSE = range(4)
+
+
+def pack_arrays(*arrays):
+    """Return the arrays as bytes.
+
+    Keyword arguments:
+        arrays -- numeric ndarrays
+    """
+    parts = []
+
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+
+        if array.dtype.hasobject:
+            raise TypeError('Only numeric arrays can be sent to sites.')
+
+        parts.append(ARRAY.pack(array.dtype.char.encode(), array.ndim))
+        parts.append(struct.pack('!{}I'.format(array.ndim), *array.shape))
+        parts.append(array.tobytes())
+
+    return b''.join(parts)
+
+
+def unpack_arrays(payload):
+    """Return the list of arrays packed by pack_arrays.
+
+    Keyword arguments:
+        payload -- bytes
+    """
+    arrays = []
+    offset = 0
+
+    while offset < len(payload):
+        char, ndim = ARRAY.unpack_from(payload, offset)
+        offset += ARRAY.size
+
+        shape = struct.unpack_from('!{}I'.format(ndim), payload, offset)
+        offset += 4 * ndim
+
+        dtype = np.dtype(char.decode())
+        size = int(np.prod(shape)) * dtype.itemsize
+
+        arrays.append(np.frombuffer(payload, dtype, int(np.prod(shape)), offset).reshape(shape))
+        offset += size
+
+    return arrays
+
+
+def encode_object(obj):
+    """Return an object as a JSON-compatible spec, {"module": str, "class": str, "params": {...}},
+    or None.
+    Params are its constructor's arguments read from its attributes, as sklearn's get_params.
+
+    Keyword arguments:
+        obj -- an estimator or a policy, e.g., MLPWarmStart, or None
+    """
+    if obj is None:
+        return None
+
+    signature = inspect.signature(type(obj).__init__)
+    names = [p.name for p in signature.parameters.values()
+             if p.name != 'self' and p.kind not in (p.VAR_POSITIONAL, p.VAR_KEYWORD)]
+
+    return {'module': type(obj).__module__,
+            'class': type(obj).__qualname__,
+            'params': {name: encode_value(getattr(obj, name)) for name in names}}
+
+
+def encode_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return {'tuple' if isinstance(value, tuple) else 'list': [encode_value(v) for v in value]}
+    if hasattr(value, 'get_params'):
+        return {'object': encode_object(value)}
+
+    raise TypeError('{} cannot be sent to sites, set it with a number, a string or an estimator.'
+                    .format(type(value).__name__))
+
+
+def decode_object(spec):
+    """Return the object of a spec returned by encode_object."""
+    if spec is None:
+        return None
+
+    cls = importlib.import_module(spec['module'])
+
+    for name in spec['class'].split('.'):
+        cls = getattr(cls, name)
+
+    return cls(**{k: decode_value(v) for k, v in spec['params'].items()})
+
+
+def decode_value(value):
+    if not isinstance(value, dict):
+        return value
+    if 'object' in value:
+        return decode_object(value['object'])
+    if 'tuple' in value:
+        return tuple(decode_value(v) for v in value['tuple'])
+
+    return [decode_value(v) for v in value['list']]
+
+
+def send(conn, kind, payload=b''):
+    """Send a message and return the number of bytes sent."""
+    conn.sendall(HEADER.pack(kind, len(payload)) + payload)
+    return HEADER.size + len(payload)
+
+
+def receive(conn):
+    """Receive a message and return (type, payload, number of bytes received)."""
+    kind, length = HEADER.unpack(receive_exactly(conn, HEADER.size))
+    return kind, receive_exactly(conn, length), HEADER.size + length
+
+
+def receive_exactly(conn, n):
+    buffer = bytearray(n)
+    view = memoryview(buffer)
+
+    while n > 0:
+        received = conn.recv_into(view[len(buffer) - n:], n)
+
+        if received == 0:
+            raise ConnectionError('Site closed the connection.')
+
+        n -= received
+
+    return bytes(buffer)
+
+
+def serve(listener):
+    """Run a learner site: hold a partition's columns, fit and predict the folds it receives.
+
+    Keyword arguments:
+        listener -- a listening socket
+    """
+    conn, _ = listener.accept()
+    listener.close()
+
+    learner = None
+
+    with conn:
+        while True:
+            kind, payload, _ = receive(conn)
+
+            if kind == SETUP:
+                X, y, features, config = unpack_arrays(payload)
+                config = json.loads(config.tobytes().decode())
+
+                learner = Learner(X.copy(), y, decode_object(config['classifier']),
+                                  decode_object(config['preprocessor']))
+                learner.features = features
+                learner.warm_start = decode_object(config['warm_start'])
+                learner.approximation = decode_object(config['approximation'])
+                learner.n_shards = config['n_shards']
+
+            elif kind == FOLD:
+                fold = unpack_arrays(payload)
+
+                learner.fit_fold(fold)
+                y_pred, y_proba_val, y_proba_test, _ = learner.evaluate(fold)
+
+                epochs = np.nan if learner.epochs is None else learner.epochs
+                stats = np.array([learner.fit_seconds, learner.predict_seconds, epochs])
+
+                send(conn, OUTPUTS, pack_arrays(y_pred, y_proba_val, y_proba_test, stats))
+
+            else:
+                break
+
+
+class Sites():
+    """Run each learner in its own process, a site, reached over localhost sockets.
+
+    Description:
+        Each seed, a site receives its partition's columns, the targets, its features and its
+        learner's classifier, preprocessor, warm-start, SVC approximation and row shards. Each
+        fold, it receives the fold's indexes, fits and returns its predictions and probabilities.
+        Messages are a 5-byte header (type and length) and arrays as raw bytes after their
+        dtype and shape. Objects are sent, unfitted, as a UTF-8 JSON array of their class and
+        constructor's params (see encode_object) and built again by the site, so their params
+        must be numbers, strings, sequences or estimators. Sites are forked, so it runs only
+        where fork is available.
+
+    Properties:
+        transport -- {'tcp', 'unix'} (default 'tcp')
+        bytes_sent -- bytes sent to the sites by the last call
+        bytes_received -- bytes received from the sites by the last call
+    """
+
+    transports = ('tcp', 'unix')
+
+    def __init__(self, transport='tcp'):
+        if transport not in self.transports:
+            raise ValueError('{} is not a valid transport.'.format(transport))
+
+        self.transport = transport
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+        self.__processes = []
+        self.__connections = []
+        self.__folder = None
+
+    def start(self, n_sites):
+        """Start n_sites sites and connect to them."""
+        context = mp.get_context('fork')
+
+        if self.transport == 'unix':
+            self.__folder = tempfile.mkdtemp()
+
+        for i in range(n_sites):
+            if self.transport == 'tcp':
+                listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                listener.bind(('127.0.0.1', 0))
+            else:
+                listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                listener.bind(os.path.join(self.__folder, 'site_{}.sock'.format(i)))
+
+            listener.listen(1)
+
+            process = context.Process(target=serve, args=(listener,), daemon=True)
+            process.start()
+
+            conn = socket.socket(listener.family, socket.SOCK_STREAM)
+            conn.connect(listener.getsockname())
+
+            if self.transport == 'tcp':
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            listener.close()
+
+            self.__processes.append(process)
+            self.__connections.append(conn)
+
+    def setup(self, learners):
+        """Send each learner's partition and policies to its site.
+
+        Keyword arguments:
+            learners -- a list of Learners, one per site
+        """
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+        for conn, learner in zip(self.__connections, learners):
+            config = {'classifier': encode_object(learner.classifier),
+                      'preprocessor': encode_object(learner.preprocessor),
+                      'warm_start': encode_object(learner.warm_start),
+                      'approximation': encode_object(learner.approximation),
+                      'n_shards': learner.n_shards}
+
+            config = np.frombuffer(json.dumps(config).encode(), dtype=np.uint8)
+
+            X = np.asarray(learner.X, dtype=np.float64)
+            features = np.asarray(learner.features, dtype=np.int64)
+
+            self.bytes_sent += send(conn, SETUP, pack_arrays(X, learner.y, features, config))
+
+    def run_fold(self, fold):
+        """Fit and predict a fold in all sites at once.
+
+        Keyword arguments:
+            fold -- (train, validation, test) instances' indexes
+
+        Return: each site's (y_pred, y_proba_val, y_proba_test, [fit_seconds, predict_seconds,
+        epochs]) and the wall-clock seconds.
+        """
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+        payload = pack_arrays(*[np.asarray(i, dtype=np.int32) for i in fold])
+
+        start = time()
+
+        for conn in self.__connections:
+            self.bytes_sent += send(conn, FOLD, payload)
+
+        outputs = []
+
+        for conn in self.__connections:
+            _, reply, n_bytes = receive(conn)
+
+            outputs.append(unpack_arrays(reply))
+            self.bytes_received += n_bytes
+
+        return outputs, time() - start
+
+    def close(self):
+        """Stop the sites."""
+        for conn in self.__connections:
+            send(conn, CLOSE)
+            conn.close()
+
+        for process in self.__processes:
+            process.join()
+
+        if self.__folder is not None:
+            for name in os.listdir(self.__folder):
+                os.remove(os.path.join(self.__folder, name))
+
+            os.rmdir(self.__folder)
+
+        self.__processes = []
+        self.__connections = []
+        self.__folder = None
+
+
+def load_sites(params):
+    """Return a Sites from the params' dict or None if learners run in-process.
+
+    Keyword arguments:
+        params -- a dict as {"transport": str}
+    """
+    if params is None:
+        return None
+
+    return Sites(**params)
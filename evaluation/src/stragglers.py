@@ -0,0 +1,73 @@
+import numpy as np
+
+
+class Stragglers():
+    """Simulate learners that respond late to the aggregators.
+
+    Description:
+        Each fold, every learner gets a latency and, for each deadline, the aggregators
+        only receive the outputs of the learners whose latency is within the deadline.
+        Latencies are drawn from a distribution:
+            measured -- the learner's measured fit and predict seconds
+            exponential -- an exponential distribution with mean scale
+            lognormal -- a log-normal distribution with median scale and shape sigma
+        and multiplied by the learner's scale when it is measured.
+
+    Properties:
+        deadlines -- a list of deadlines in seconds
+        latency -- {'measured', 'exponential', 'lognormal'} (default 'measured')
+        scale -- a float or a list with each learner's float (default 1.0)
+        sigma -- shape of the log-normal distribution (default 0.5)
+        random_state -- seed of the latencies (default None)
+    """
+
+    distributions = ('measured', 'exponential', 'lognormal')
+
+    def __init__(self, deadlines, latency='measured', scale=1.0, sigma=0.5, random_state=None):
+        if latency not in self.distributions:
+            raise ValueError('{} is not a valid latency distribution.'.format(latency))
+
+        self.deadlines = sorted(deadlines)
+        self.latency = latency
+        self.scale = scale
+        self.sigma = sigma
+        self.random_state = np.random.RandomState(random_state)
+
+    def latencies(self, measured):
+        """Return each learner's latency for a fold.
+
+        Keyword arguments:
+            measured -- each learner's measured seconds
+        """
+        n = len(measured)
+        scale = np.broadcast_to(np.asarray(self.scale, dtype=float), (n,))
+
+        if self.latency == 'exponential':
+            return self.random_state.exponential(scale)
+
+        if self.latency == 'lognormal':
+            return scale * self.random_state.lognormal(0, self.sigma, n)
+
+        return scale * np.asarray(measured)
+
+    def reported(self, latencies):
+        """Yield (deadline, indexes of the learners that reported within it).
+
+        Keyword arguments:
+            latencies -- each learner's latency
+        """
+        for deadline in self.deadlines:
+            yield deadline, np.flatnonzero(latencies <= deadline)
+
+
+def load_stragglers(params):
+    """Return a Stragglers from the params' dict or None if there is no simulation.
+
+    Keyword arguments:
+        params -- a dict as {"deadlines": list, "latency": str, "scale": float or list,
+                  "sigma": float, "random_state": int}
+    """
+    if params is None:
+        return None
+
+    return Stragglers(**params)
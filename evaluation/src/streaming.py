@@ -0,0 +1,141 @@
+import numpy as np
+
+from time import time
+from tempfile import TemporaryDirectory
+from os.path import join
+from sklearn.base import clone
+
+
+class Stream():
+    """Fit and predict learners on data read in chunks, with partial_fit.
+
+    Description:
+        All folds of a CV iteration are trained at once: for each chunk, each fold's
+        copy of each learner is partially fitted on the chunk's training rows of its
+        partition. Then, a second pass predicts the validation and test rows of all
+        folds and writes them, chunk by chunk, to each fold's memory-mapped buffer.
+        Folds are held as sorted index sets, so each chunk's rows of a fold are found
+        with a binary search. Only the chunk and the models are kept in memory.
+
+    Properties:
+        chunksize -- number of lines per chunk, for StreamData (default 10000)
+        epochs -- number of training passes over the data (default 1)
+        directory -- where the outputs' buffers are written (default None, a temporary directory)
+    """
+
+    def __init__(self, chunksize=10000, epochs=1, directory=None):
+        self.chunksize = chunksize
+        self.epochs = epochs
+        self.directory = directory
+        self.__buffers = None
+
+    def run(self, data, learners, folds):
+        """Return each fold's learners' outputs, as
+        [(y_pred, y_proba_val, y_proba_test, [fit_seconds, predict_seconds, nan]), ...].
+        Outputs are memory-mapped and valid until the next run.
+
+        Keyword arguments:
+            data -- a StreamData
+            learners -- a list of Learners, with their classifiers and features
+            folds -- a list of (train, validation, test) sorted instances' indexes
+        """
+        for learner in learners:
+            if not hasattr(learner.classifier, 'partial_fit'):
+                raise ValueError('{} does not implement partial_fit.'.format(type(learner.classifier).__name__))
+
+        y = data.y
+        classes = np.arange(data.n_classes)
+
+        n_folds = len(folds)
+        n_learners = len(learners)
+
+        models = [[clone(learner.classifier) for learner in learners] for _ in folds]
+        fit_seconds = np.zeros((n_folds, n_learners))
+        predict_seconds = np.zeros((n_folds, n_learners))
+
+        for _ in range(self.epochs):
+            for offset, x in data.chunks():
+                for f, (train_i, _, _) in enumerate(folds):
+                    rows = self.__rows(train_i, offset, x.shape[0])[0]
+
+                    if len(rows) == 0:
+                        continue
+
+                    x_train = x[rows, :]
+                    y_train = y[rows + offset]
+
+                    for j in range(n_learners):
+                        start = time()
+                        models[f][j].partial_fit(x_train[:, learners[j].features], y_train, classes=classes)
+                        fit_seconds[f, j] += time() - start
+
+        # The previous run's buffers are removed, mapped arrays stay readable
+        self.__buffers = TemporaryDirectory(dir=self.directory)
+
+        proba, pred = [], []
+
+        for f, (_, val_i, test_i) in enumerate(folds):
+            shape = (n_learners, len(val_i) + len(test_i), len(classes))
+            path = join(self.__buffers.name, 'fold_{}'.format(f))
+
+            proba.append(np.lib.format.open_memmap(path + '_proba.npy', 'w+', float, shape))
+            pred.append(np.lib.format.open_memmap(path + '_pred.npy', 'w+', int, (n_learners, len(test_i))))
+
+        for offset, x in data.chunks():
+            for f, (_, val_i, test_i) in enumerate(folds):
+                val_rows, val_slice = self.__rows(val_i, offset, x.shape[0])
+                test_rows, test_slice = self.__rows(test_i, offset, x.shape[0])
+
+                if len(val_rows) + len(test_rows) == 0:
+                    continue
+
+                # Validation and test outputs of the chunk are contiguous in the buffer
+                x_predict = x[np.concatenate((val_rows, test_rows)), :]
+                n_val = len(val_rows)
+                buffered = slice(len(val_i) + test_slice.start, len(val_i) + test_slice.stop)
+
+                for j in range(n_learners):
+                    start = time()
+                    y_proba = models[f][j].predict_proba(x_predict[:, learners[j].features])
+                    predict_seconds[f, j] += time() - start
+
+                    proba[f][j, val_slice, :] = y_proba[:n_val]
+                    proba[f][j, buffered, :] = y_proba[n_val:]
+                    pred[f][j, test_slice] = y_proba[n_val:].argmax(axis=1)
+
+        outputs = []
+
+        for f, (_, val_i, _) in enumerate(folds):
+            n_val = len(val_i)
+            fold = []
+
+            proba[f].flush()
+            pred[f].flush()
+
+            for j in range(n_learners):
+                stats = np.array([fit_seconds[f, j], predict_seconds[f, j], np.nan])
+
+                fold.append((pred[f][j], proba[f][j, :n_val, :], proba[f][j, n_val:, :], stats))
+
+            outputs.append(fold)
+
+        return outputs
+
+    @staticmethod
+    def __rows(indexes, offset, n_rows):
+        """Return the chunk's rows of a sorted index set and their slice in it."""
+        start, stop = np.searchsorted(indexes, [offset, offset + n_rows])
+
+        return indexes[start:stop] - offset, slice(start, stop)
+
+
+def load_stream(params):
+    """Return a Stream from the params' dict or None if data is loaded in memory.
+
+    Keyword arguments:
+        params -- a dict as {"chunksize": int, "epochs": int, "directory": str}
+    """
+    if params is None:
+        return None
+
+    return Stream(**params)
@@ -1,8 +1,14 @@
-from .data import Data
+import numpy as np
+
+from .data import Data, StreamData
+from copy import deepcopy
+from fnmatch import fnmatch
+from pandas import DataFrame, read_csv
 from .metrics import summary
 from sklearn.metrics import make_scorer
 from .simulator import FeatureDistributedSimulator
 from .agents import ArbiterMetaDiff, ArbiterMetaDiffInc, ArbiterMetaDiffIncCorr
+from .agents import Voter, Combiner, Mathematician, Hierarchy
 
 
 def load_imports(imports):
@@ -22,6 +28,34 @@ def load_imports(imports):
     return objs
 
 
+def load_learners(classifiers, n_learners=None, mix=None, random_state=None):
+    """Return (classifiers' objects, learners' names, classifiers' ids), one per learner.
+
+    Keyword arguments:
+        classifiers -- {<classifier id>: <full method call>}
+        n_learners -- number of learners (default None, i.e., one learner per classifier)
+        mix -- {<classifier id>: <weight>} to draw classifiers with these proportions
+               instead of round-robin (default None)
+        random_state -- seed used to draw from mix (default None)
+    """
+    ids = list(classifiers.keys())
+
+    if n_learners is None:
+        return load_imports(classifiers), ids, ids
+
+    if mix is None:
+        assigned = [ids[i % len(ids)] for i in range(n_learners)]
+    else:
+        rs = np.random.RandomState(random_state)
+        weights = np.array([mix.get(c, 0) for c in ids], dtype=float)
+        assigned = list(rs.choice(ids, size=n_learners, p=weights / weights.sum()))
+
+    names = ['{}_{}'.format(c, i) for i, c in enumerate(assigned)]
+    objs = load_imports({names[i]: classifiers[c] for i, c in enumerate(assigned)})
+
+    return objs, names, assigned
+
+
 def split_parts(label):
     parts = label.split('.')                         # separate in parts
 
@@ -55,16 +89,144 @@ def load_scorers(metrics):
     return scorers
 
 
-def load_arbiters(arbiters):
-    methods = load_imports(arbiters['methods'])
+def load_arbiters(arbiters, input_mode='proba'):
+    selected = arbiters.get('selected')
     arbiter_objs = []
 
+    if selected is None:
+        methods = load_imports(arbiters['methods'])
+
     for arbiter_class in arbiters['classes']:
-        arb = eval(arbiter_class + '(methods)')
+        if selected is not None:
+            if len(selected[arbiter_class]) == 0:
+                continue
+
+            methods = load_imports({m: arbiters['methods'][m] for m in selected[arbiter_class]})
+
+        arb = eval(arbiter_class + '(methods, input_mode)')
         arbiter_objs.append(arb)
 
     return arbiter_objs
 
+
+def load_aggregator(spec, input_mode='proba'):
+    """Return an aggregator from a spec with only one aggregator, in the params' format.
+
+    Keyword arguments:
+        spec -- a dict as {"voter": {...}}, {"combiner": {...}}, {"mathematician": {...}}
+                or {"arbiter": {...}} with only one class, as results are named after
+                the spec by aggregator_names
+        input_mode -- combiners' and arbiters' input (default 'proba')
+    """
+    if len(spec) != 1:
+        raise ValueError('An aggregator spec must have only one aggregator: {}.'.format(list(spec)))
+
+    kind, params = next(iter(spec.items()))
+
+    if kind == 'voter':
+        return Voter(list(params.values()))
+    elif kind == 'combiner':
+        return Combiner(load_imports(params), input_mode)
+    elif kind == 'mathematician':
+        return Mathematician(params)
+    elif kind == 'arbiter':
+        arbiters = load_arbiters(params, input_mode)
+
+        if len(arbiters) != 1:
+            raise ValueError('An arbiter spec must have only one class: {}.'.format(params['classes']))
+
+        return arbiters[0]
+
+    raise ValueError('{} is not a valid aggregator.'.format(kind))
+
+
+def load_hierarchy(hierarchy, input_mode='proba'):
+    """Return a Hierarchy from the params' dict or None if there is no hierarchy.
+
+    Keyword arguments:
+        hierarchy -- a dict as {"n_clusters": int, "cluster": <spec>, "root": <spec>, "cv": int}
+        input_mode -- combiners' and arbiters' input (default 'proba')
+    """
+    if hierarchy is None:
+        return None
+
+    cluster = load_aggregator(hierarchy['cluster'], input_mode)
+    root = load_aggregator(hierarchy['root'], input_mode)
+
+    return Hierarchy(cluster, root, hierarchy['n_clusters'], hierarchy.get('cv', 5))
+
+
+def arbiter_name(arbiter_class, method):
+    """Return the results' name of an arbiter class and method label."""
+    return str(eval(arbiter_class + '()')) + '_' + method
+
+
+def aggregator_names(p):
+    """Return the results' names of the aggregators in params, in the results' order.
+
+    Keyword arguments:
+        p -- params dict
+    """
+    voter_names = list(p.get('voter', {}).keys())
+    combiner_names = list(p.get('combiner', {}).keys())
+
+    arbiter_names = []
+    arbiter = p.get('arbiter', {'classes': [], 'methods': {}})
+    selected = arbiter.get('selected')
+
+    for arb in arbiter['classes']:
+        arb_methods = arbiter['methods'].keys() if selected is None else selected[arb]
+        arbiter_names += [arbiter_name(arb, name) for name in arb_methods]
+
+    mathematician_names = list()
+    for names in p.get('mathematician', {}).values():
+        mathematician_names += [name for name in names]
+
+    hierarchy_names = list()
+    if 'hierarchy' in p:
+        hierarchy_names += ['hier_' + name for name in aggregator_names(p['hierarchy']['root'])]
+
+    return voter_names + combiner_names + arbiter_names + mathematician_names + hierarchy_names
+
+
+def select_methods(p, include=None, exclude=None, done=()):
+    """Return a copy of params keeping only the requested aggregation methods.
+
+    Arbiters' selected methods are saved in p['arbiter']['selected'] as
+    {<arbiter class>: [<method labels>]}.
+
+    Keyword arguments:
+        p -- params dict
+        include -- a list of names' patterns (fnmatch) to be run (default None, i.e., all)
+        exclude -- a list of names' patterns (fnmatch) not to be run (default None)
+        done -- names already in results (default ())
+    """
+    def keep(name):
+        if name in done:
+            return False
+
+        if include and not any(fnmatch(name, pattern) for pattern in include):
+            return False
+
+        return not (exclude and any(fnmatch(name, pattern) for pattern in exclude))
+
+    p = deepcopy(p)
+
+    p['voter'] = {k: v for k, v in p['voter'].items() if keep(k)}
+    p['combiner'] = {k: v for k, v in p['combiner'].items() if keep(k)}
+
+    mathematician = {aux: [op for op in ops if keep(op)] for aux, ops in p['mathematician'].items()}
+    p['mathematician'] = {aux: ops for aux, ops in mathematician.items() if len(ops) > 0}
+
+    arbiter = p['arbiter']
+    arbiter['selected'] = {c: [m for m in arbiter['methods'] if keep(arbiter_name(c, m))]
+                           for c in arbiter['classes']}
+
+    if 'hierarchy' in p and not all(keep(name) for name in aggregator_names({'hierarchy': p['hierarchy']})):
+        del p['hierarchy']
+
+    return p
+
 def test(**kwargs):
     """Test over params and save results.
 
@@ -88,7 +250,58 @@ def test(**kwargs):
             A list of scorers returned by make_scorer.
 
         classifiers: list
-            A list of classifiers objects.
+            A list of classifiers objects, one per learner.
+
+        classifier_ids: list
+            Each learner's classifier id (default classifiers' names).
+
+        preprocessor: object
+            A transformer fitted once per fold and partition (default None).
+
+        warm_start: MLPWarmStart
+            A warm-start policy for MLP learners (default None).
+
+        binner: Binner
+            A Binner whose bins are shared by tree learners (default None).
+
+        svc_approximation: SVCApproximation
+            A policy to approximate SVC learners on large partitions (default None).
+
+        projections: list
+            Each classifier's PartitionProjection or None (default None).
+
+        tuner: SuccessiveHalving
+            A tuner of learners' hyperparameters (default None).
+
+        batch_aggregation: bool
+            Apply stateless aggregators once per CV iteration (default False).
+
+        communication: Communication
+            Compress probabilities sent to aggregators and count bytes (default None).
+
+        stragglers: Stragglers
+            Also aggregate only the learners within each deadline (default None).
+
+        sites: Sites
+            Fit and predict each learner in its own process (default None).
+
+        network: NetworkModel
+            Estimate each aggregation scheme's distributed wall-clock (default None).
+
+        row_shards: int
+            Number of row shards per partition, each one with its own model (default None).
+
+        stream: Stream
+            Read the dataset in chunks and fit learners with partial_fit (default None).
+
+        cascade: Cascade
+            Estimate arbiters' early-exit inference (default None).
+
+        pruner: Pruner
+            Search cheaper ensembles on validation outputs (default None).
+
+        online: OnlineReplay
+            Also aggregate test outputs as a stream (default None).
 
         voter: Voter
             A Voter object.
@@ -102,11 +315,18 @@ def test(**kwargs):
         mathematician: Mathematician
             A Mathematician object.
 
+        hierarchy: Hierarchy
+            A Hierarchy object (default None).
+
         names: list
             Classifiers and aggregators' names.
 
         results_path: string
             Results' directory absolute/relative path.
+
+        existing: list
+            Names whose scores are already in results_path, to be added to
+            the summary (default []).
     """
 
     # Data information
@@ -119,23 +339,51 @@ def test(**kwargs):
     # Classifiers
     scorers = kwargs['scorers']
     classifiers = kwargs['classifiers']
+    preprocessor = kwargs.get('preprocessor')
+    warm_start = kwargs.get('warm_start')
+    binner = kwargs.get('binner')
+    svc_approximation = kwargs.get('svc_approximation')
+    projections = kwargs.get('projections')
+    tuner = kwargs.get('tuner')
+    batch_aggregation = kwargs.get('batch_aggregation', False)
+    communication = kwargs.get('communication')
+    stragglers = kwargs.get('stragglers')
+    sites = kwargs.get('sites')
+    network = kwargs.get('network')
+    row_shards = kwargs.get('row_shards')
+    stream = kwargs.get('stream')
+    cascade = kwargs.get('cascade')
+    pruner = kwargs.get('pruner')
+    online = kwargs.get('online')
 
     # Aggregators
     voter = kwargs['voter']
     arbiters = kwargs['arbiters']
     combiner = kwargs['combiner']
     mathematician = kwargs['mathematician']
-    aggregators = [voter, combiner] + arbiters + [mathematician]
+    hierarchy = kwargs.get('hierarchy')
+    aggregators = [voter, combiner] + arbiters + [mathematician, hierarchy]
+    aggregators = [a for a in aggregators if a is not None]
 
     # For results
     names = kwargs['names']
+    classifier_ids = kwargs.get('classifier_ids', names[:len(classifiers)])
     results_path = kwargs['results_path']
 
     # Simulate distribution
-    data = Data.load(filepath, class_column)
+    if stream is None:
+        data = Data.load(filepath, class_column)
+    else:
+        data = StreamData(filepath, class_column, stream.chunksize)
 
     # Create simulator (agents' manager)
-    simulator = FeatureDistributedSimulator(data, classifiers, aggregators)
+    simulator = FeatureDistributedSimulator(data, classifiers, aggregators,
+                                            preprocessor, warm_start, binner,
+                                            svc_approximation, projections,
+                                            tuner, classifier_ids,
+                                            batch_aggregation, communication,
+                                            stragglers, sites, network, row_shards,
+                                            stream, cascade, pruner, online)
 
     # Cross validate
     ranks, scores = simulator.evaluate(overlap, random_state, scorers, iterations)
@@ -152,7 +400,25 @@ def test(**kwargs):
 
     [scores[i].to_csv('{}/cv_scores_{}.csv'.format(results_path, names[i])) for i in range(n)]
 
+    # Aggregators' results' names by key, for reports
+    n_keys = len(simulator.aggregator_keys)
+    aggr_names = dict(zip(simulator.aggregator_keys, names[n - n_keys:]))
+
+    # Reuse scores already in results_path
+    existing = kwargs.get('existing', [])
+    scores += [read_csv('{}/cv_scores_{}.csv'.format(results_path, e), index_col=0) for e in existing]
+    names = names + existing
+
     # Create CV summary
     stats = summary(scores)
     stats.index = names
     stats.to_csv('{}/cv_summary.csv'.format(results_path))
+
+    # Save extra reports
+    for name, rows in simulator.reports.items():
+        report = DataFrame(rows)
+
+        if 'aggregator' in report:
+            report['aggregator'] = report['aggregator'].map(aggr_names)
+
+        report.to_csv('{}/{}.csv'.format(results_path, name), index=False)
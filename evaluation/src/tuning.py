@@ -0,0 +1,138 @@
+import os
+import json
+import numpy as np
+
+from copy import deepcopy
+from hashlib import md5
+
+from sklearn.base import clone
+from sklearn.model_selection import ParameterGrid
+
+
+class SuccessiveHalving():
+    """Tune learners' hyperparameters by successive halving over CV folds.
+
+    Description:
+        Every candidate is fitted on the training rows and scored (accuracy) on the
+        validation rows of the first fold. Only the best 1/eta candidates are promoted
+        to the next rung, which uses eta times more folds, until one candidate is left
+        or all folds are used. Winners are cached per (dataset, classifier, partition,
+        search space, eta and bins) and, if cache_path is set, saved to a JSON file to be
+        reused by other runs. Each fold is transformed as the learner's fit would: binned
+        on its training rows if a binner is given, or preprocessed. The learner is not
+        changed.
+
+    Properties:
+        spaces -- {<classifier id>: {<param>: [<values>]}}
+        dataset -- dataset's name used in cache keys
+        eta -- fraction of promoted candidates (1/eta) and folds' growth per rung (default 3)
+        cache_path -- JSON file to load and save winners (default None)
+    """
+
+    def __init__(self, spaces, dataset, eta=3, cache_path=None):
+        self.spaces = spaces
+        self.dataset = dataset
+        self.eta = eta
+        self.cache_path = cache_path
+        self.cache = dict()
+
+        if cache_path is not None and os.path.exists(cache_path):
+            with open(cache_path, 'r') as file:
+                self.cache = json.load(file)
+
+    def key(self, classifier_id, features, binner=None):
+        features = ','.join(str(f) for f in sorted(features))
+
+        # A changed space, eta or binning is tuned again
+        space = [self.spaces[classifier_id], self.eta] + ([binner.max_bins] if binner is not None else [])
+        space = json.dumps(space, sort_keys=True, default=str)
+        space = md5(space.encode()).hexdigest()[:12]
+
+        return '{}:{}:{}:{}'.format(self.dataset, classifier_id, features, space)
+
+    def tune(self, learner, classifier_id, folds, binner=None):
+        """Return (the best params for the learner's partition, whether it was cached).
+
+        Keyword arguments:
+            learner -- a Learner with its partition
+            classifier_id -- learner's classifier id
+            folds -- a list of (train, validation, test) instances' indexes
+            binner -- a Binner to bin each fold on its training rows, for tree learners (default None)
+        """
+        key = self.key(classifier_id, learner.features, binner)
+
+        if key in self.cache:
+            return self.cache[key], True
+
+        candidates = list(ParameterGrid(self.spaces[classifier_id]))
+        n_folds = 1
+        transformed = []
+
+        while len(candidates) > 1:
+            # Transform each fold once for all candidates
+            transformed += [self.__transform(learner, train_i, binner)
+                            for train_i, _, _ in folds[len(transformed):n_folds]]
+
+            scores = [self.__score(learner, params, folds[:n_folds], transformed) for params in candidates]
+            best = np.argsort(scores, kind='stable')[::-1]
+
+            n_promoted = max(1, len(candidates) // self.eta)
+            candidates = [candidates[i] for i in best[:n_promoted]]
+
+            if n_folds == len(folds):
+                break
+
+            n_folds = min(n_folds * self.eta, len(folds))
+
+        self.cache[key] = candidates[0]
+        self.save()
+
+        return candidates[0], False
+
+    def save(self):
+        if self.cache_path is None:
+            return
+
+        with open(self.cache_path, 'w') as file:
+            json.dump(self.cache, file)
+
+    @staticmethod
+    def __transform(learner, train_i, binner=None):
+        """Return the learner's partition as Learner.prepare would, without changing the learner.
+
+        Features are binned independently, so binning the partition's columns gives the
+        codes the learner selects from the fold's binned matrix.
+        """
+        if binner is not None:
+            return deepcopy(binner).fit(learner.X[train_i, :]).transform(learner.X)
+
+        if learner.preprocessor is None:
+            return learner.X
+
+        return clone(learner.preprocessor).fit(learner.X[train_i, :]).transform(learner.X)
+
+    def __score(self, learner, params, folds, transformed):
+        scores = []
+
+        for (train_i, val_i, _), X in zip(folds, transformed):
+            classifier = clone(learner.classifier).set_params(**params)
+            classifier.fit(X[train_i, :], learner.y[train_i])
+
+            scores.append(classifier.score(X[val_i, :], learner.y[val_i]))
+
+        return np.mean(scores)
+
+
+def load_tuning(params, dataset):
+    """Return a SuccessiveHalving from the params' dict or None if there is no tuning.
+
+    Keyword arguments:
+        params -- a dict as {"spaces": dict, "eta": int, "cache": str}
+        dataset -- dataset's filepath
+    """
+    if params is None:
+        return None
+
+    dataset = os.path.basename(dataset)
+
+    return SuccessiveHalving(params['spaces'], dataset, params.get('eta', 3), params.get('cache'))
@@ -0,0 +1,91 @@
+import numpy as np
+
+from sklearn.base import clone
+from sklearn.metrics import log_loss
+
+
+class MLPWarmStart():
+    """Warm-start policy for MLP learners.
+
+    Description:
+        Each fold's MLP starts from the weights learned in the previous fold for the
+        same partition. The weights are discarded when the partition's features change
+        (e.g. on a new seed). Optionally, training stops early when the loss on the
+        fold's validation rows does not improve, and the weights of the best epoch
+        are restored.
+
+    Properties:
+        early_stopping -- stop when the validation loss stops improving (default True)
+        n_iter_no_change -- epochs without improvement before stopping (default 10)
+        tol -- minimum loss improvement (default 1e-4)
+        features -- features of the last fitted partition
+    """
+
+    def __init__(self, early_stopping=True, n_iter_no_change=10, tol=1e-4):
+        self.early_stopping = early_stopping
+        self.n_iter_no_change = n_iter_no_change
+        self.tol = tol
+        self.features = None
+
+    def fit(self, classifier, x_train, y_train, x_val, y_val, features, classes):
+        """Fit the classifier starting from its current weights and return (classifier, epochs).
+
+        Keyword arguments:
+            classifier -- a MLPClassifier instance
+            x_train -- training set
+            y_train -- target set
+            x_val -- validation set
+            y_val -- validation target set
+            features -- partition's features indexes
+            classes -- all possible classes
+        """
+        if self.features is None or not np.array_equal(self.features, features):
+            classifier = clone(classifier)
+            self.features = features
+
+        if not self.early_stopping:
+            n_iter = getattr(classifier, 'n_iter_', 0)
+
+            classifier.set_params(warm_start=True)
+            classifier.fit(x_train, y_train)
+
+            return classifier, classifier.n_iter_ - n_iter
+
+        best_loss = np.inf
+        best_weights = None
+        no_change = 0
+        epochs = 0
+
+        for epochs in range(1, classifier.max_iter + 1):
+            classifier.partial_fit(x_train, y_train, classes=classes)
+
+            loss = log_loss(y_val, classifier.predict_proba(x_val), labels=classes)
+
+            if loss < best_loss:
+                best_weights = ([c.copy() for c in classifier.coefs_], [i.copy() for i in classifier.intercepts_])
+
+            if loss < best_loss - self.tol:
+                no_change = 0
+            else:
+                no_change += 1
+
+            best_loss = min(best_loss, loss)
+
+            if no_change >= self.n_iter_no_change:
+                break
+
+        classifier.coefs_, classifier.intercepts_ = best_weights
+
+        return classifier, epochs
+
+
+def load_warm_start(params):
+    """Return a MLPWarmStart from the params' dict or None if there is no warm start.
+
+    Keyword arguments:
+        params -- a dict as {"early_stopping": bool, "n_iter_no_change": int, "tol": float}
+    """
+    if params is None:
+        return None
+
+    return MLPWarmStart(**params)